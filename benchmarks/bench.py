@@ -0,0 +1,282 @@
+import argparse
+import importlib.util
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+import networkx as nx
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from qaoa.qaoa import QAOAMaxCut
+from qaoa.data_processor import DataProcessor, state_labels
+from data.loader import write_values, load_store
+from ui.html_plot import create_plot_html
+
+# Benchmarks of the simulate -> process -> serialize -> render pipeline.
+# Every benchmark runs over the grid of the axes it depends on (graph kind,
+# qubits, layers, runs); wall time is measured without tracing, peak memory
+# in one extra traced call. Results go to a JSON file that can be stored as
+# the baseline of later runs:
+#
+#   python -m benchmarks.bench --quick --save-baseline
+#   python -m benchmarks.bench --quick          # compares against it
+
+BASELINE_PATH = os.path.join(ROOT, "benchmarks", "baseline.json")
+RESULTS_PATH = os.path.join(ROOT, "benchmarks", "results.json")
+
+GRID = {"graph": ["ring", "regular", "complete"], "qubits": [4, 8, 12, 16, 20], "layers": [1, 3], "runs": [1, 8]}
+QUICK_GRID = {"graph": ["ring", "regular", "complete"], "qubits": [4, 8, 12], "layers": [1, 2], "runs": [1, 4]}
+
+def ring_graph(n, seed=None):
+    return [(i, (i + 1) % n) for i in range(n)]
+
+def regular_graph(n, seed=None):
+    # 3-regular when n is even, 4-regular otherwise
+    degree = 3 if n % 2 == 0 else 4
+    return sorted(tuple(sorted(edge)) for edge in nx.random_regular_graph(min(degree, n - 1), n, seed=seed).edges())
+
+def complete_graph(n, seed=None):
+    return [(i, j) for i in range(n) for j in range(i + 1, n)]
+
+GRAPHS = {"ring": ring_graph, "regular": regular_graph, "complete": complete_graph}
+
+def load_script():
+    # the top-level qaoa.py script (shadowed by the qaoa package on import);
+    # it creates ./charts on import, so it is loaded from a scratch directory
+    spec = importlib.util.spec_from_file_location("qaoa_script", os.path.join(ROOT, "qaoa.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+class Case:
+    # inputs shared by the benchmarks of one grid point, built lazily
+    def __init__(self, graph, qubits, layers, runs, backend, steps, seed, workdir):
+        self.kind = graph
+        self.graph = GRAPHS[graph](qubits, seed)
+        self.qubits = qubits
+        self.layers = layers
+        self.runs = runs
+        self.backend = backend
+        self.steps = steps
+        self.workdir = workdir
+        rng = np.random.default_rng(seed)
+        self.gammas = rng.uniform(0, np.pi, (runs, layers))
+        self.betas = rng.uniform(0, np.pi / 2, (runs, layers))
+        self._batch = None
+
+    @property
+    def batch(self):
+        # (runs, 2 * layers, 2**qubits) snapshots
+        if self._batch is None:
+            qaoa = QAOAMaxCut(self.graph, self.layers, backend=self.backend)
+            self._batch = np.asarray(qaoa.run_batch(self.gammas, self.betas))
+        return self._batch
+
+    def states(self):
+        return state_labels(np.arange(2 ** self.qubits), self.qubits)
+
+    def fixed_params(self):
+        return [self.gammas[:, 0].tolist(), self.betas[:, 0].tolist()]
+
+# name -> (axes, max qubits or None, setup(case, script) returning the timed callable)
+
+def bench_qaoa_run(case, script):
+    qaoa = QAOAMaxCut(case.graph, case.layers, backend=case.backend)
+    def run():
+        for g, b in zip(case.gammas, case.betas):
+            qaoa.params = (g, b)
+            qaoa.run()
+    return run
+
+def bench_run_qaoa_for_graph(case, script):
+    params = (case.gammas[0], case.betas[0])
+    return lambda: script.run_qaoa_for_graph(case.graph, case.layers, params=params, backend=case.backend)
+
+def bench_run_qaoa_for_graph_train(case, script):
+    return lambda: script.run_qaoa_for_graph(case.graph, case.layers, steps=case.steps, seed=0, backend=case.backend)
+
+def bench_get_values_from_snaps(case, script):
+    dp = DataProcessor(case.batch)
+    return dp.get_values_from_snaps
+
+def bench_from_state_to_values(case, script):
+    states, snaps = case.states(), case.batch[0]
+    return lambda: script.from_state_to_values(states, snaps, case.qubits)
+
+def bench_write_values(case, script):
+    probs, _ = DataProcessor(case.batch, as_arrays=True).get_values_from_snaps()
+    states, params = case.states(), case.fixed_params()
+    path = os.path.join(case.workdir, "values.qres")
+    return lambda: write_values(path, 2 * case.layers, [0, 1], params, states, probs)
+
+def bench_load_store(case, script):
+    # open the store and read every value of every run once
+    path = os.path.join(case.workdir, "values.qres")
+    bench_write_values(case, script)()
+    def load():
+        store = load_store(path)
+        return store["Metric"].sum(), store.states()
+    return load
+
+def bench_create_plot_html(case, script):
+    probs, _ = DataProcessor(case.batch, as_arrays=True).get_values_from_snaps()
+    data = DataProcessor({}).get_data_per_layer(case.states(), probs, 2 * case.layers)
+    states, params = case.states(), case.gammas[:, 0].round(3).tolist()
+    return lambda: create_plot_html(states, data, params, (0, 1), case.runs, "Probability")
+
+BENCHMARKS = {
+    "qaoa_run": (("graph", "qubits", "layers", "runs"), None, bench_qaoa_run),
+    "run_qaoa_for_graph": (("graph", "qubits", "layers"), None, bench_run_qaoa_for_graph),
+    "run_qaoa_for_graph_train": (("graph", "qubits", "layers"), None, bench_run_qaoa_for_graph_train),
+    # nested Python lists of every value: gigabytes at 20 qubits
+    "get_values_from_snaps": (("qubits", "layers", "runs"), 16, bench_get_values_from_snaps),
+    "from_state_to_values": (("qubits", "layers"), None, bench_from_state_to_values),
+    # every value of every run: hundreds of MB at 20 qubits
+    "write_values": (("qubits", "layers", "runs"), 18, bench_write_values),
+    "load_store": (("qubits", "layers", "runs"), 18, bench_load_store),
+    "create_plot_html": (("qubits", "layers", "runs"), None, bench_create_plot_html),
+}
+
+def case_key(name, params):
+    return name + "[" + ",".join(f"{axis}={value}" for axis, value in params.items()) + "]"
+
+def measure(func, repeat):
+    # wall times of `repeat` untraced calls, then the traced peak of one more
+    # call; the first call is a warm-up unless it alone takes over a second
+    # (20-qubit training), then it already counts as a sample
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    times = [first] if first > 1.0 else []
+    while len(times) < repeat:
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return times, peak
+
+def run_benchmarks(grid, names=None, repeat=3, backend="numpy", steps=20, seed=0, verbose=True):
+    # returns the result document written by main()
+    names = names or list(BENCHMARKS)
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            script = load_script()
+            for name in names:
+                axes, max_qubits, setup = BENCHMARKS[name]
+                for values in itertools.product(*(grid[axis] for axis in axes)):
+                    params = dict(zip(axes, values))
+                    if max_qubits is not None and params["qubits"] > max_qubits:
+                        continue
+                    full = {"graph": "ring", "layers": 1, "runs": 1, **params}
+                    case = Case(full["graph"], full["qubits"], full["layers"], full["runs"], backend, steps, seed, workdir)
+                    times, peak = measure(setup(case, script), repeat)
+                    result = {
+                        "name": name,
+                        "key": case_key(name, params),
+                        "params": params,
+                        "time_min": min(times),
+                        "time_median": statistics.median(times),
+                        "repeat": repeat,
+                        "peak_bytes": peak
+                    }
+                    results.append(result)
+                    if verbose:
+                        print(f"{result['key']:<60} {result['time_min'] * 1e3:10.2f} ms {peak / 2 ** 20:10.2f} MiB", flush=True)
+        finally:
+            os.chdir(cwd)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+            "backend": backend,
+            "steps": steps,
+            "grid": grid
+        },
+        "results": results
+    }
+
+def compare(results, baseline, tolerance=0.25):
+    # rows (key, time ratio, peak ratio, regressed) for the keys present in
+    # both documents; a ratio above 1 + tolerance is a regression
+    previous = {result["key"]: result for result in baseline["results"]}
+    rows = []
+    for result in results["results"]:
+        base = previous.get(result["key"])
+        if base is None:
+            continue
+        time_ratio = result["time_min"] / max(base["time_min"], 1e-9)
+        peak_ratio = result["peak_bytes"] / max(base["peak_bytes"], 1)
+        rows.append((result["key"], time_ratio, peak_ratio, max(time_ratio, peak_ratio) > 1 + tolerance))
+    return rows
+
+def print_comparison(rows):
+    print(f"{'benchmark':<60} {'time':>8} {'peak':>8}")
+    for key, time_ratio, peak_ratio, regressed in rows:
+        print(f"{key:<60} {time_ratio:7.2f}x {peak_ratio:7.2f}x{'  REGRESSION' if regressed else ''}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Time and memory benchmarks of the QAOA pipeline")
+    parser.add_argument("--quick", action="store_true", help="small grid (up to 12 qubits)")
+    parser.add_argument("--graphs", nargs="+", choices=list(GRAPHS))
+    parser.add_argument("--qubits", nargs="+", type=int)
+    parser.add_argument("--layers", nargs="+", type=int)
+    parser.add_argument("--runs", nargs="+", type=int)
+    parser.add_argument("--bench", nargs="+", choices=list(BENCHMARKS), help="benchmarks to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--steps", type=int, default=20, help="training steps of run_qaoa_for_graph_train")
+    parser.add_argument("--backend", default="numpy", choices=["numpy", "pennylane"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="also store the results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown / growth before a regression")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    grid = dict(QUICK_GRID if args.quick else GRID)
+    for axis, values in (("graph", args.graphs), ("qubits", args.qubits), ("layers", args.layers), ("runs", args.runs)):
+        if values:
+            grid[axis] = values
+
+    results = run_benchmarks(grid, args.bench, args.repeat, args.backend, args.steps, args.seed)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=4)
+    print(f"results: {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=4)
+        print(f"baseline: {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline} (store one with --save-baseline)")
+        return 0
+    with open(args.baseline) as f:
+        rows = compare(results, json.load(f), args.tolerance)
+    print_comparison(rows)
+    return 1 if any(regressed for *_, regressed in rows) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
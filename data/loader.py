@@ -1,7 +1,17 @@
 import json
 import os
+import struct
+import numpy as np
+from qaoa.trace import tracer
+
+# binary result store: magic, header size, JSON header, then raw arrays
+# (each aligned so it can be memory-mapped in place)
+STORE_MAGIC = b"QAOARES1"
+STORE_ALIGN = 64
 
 def load_json(path):
+    # legacy JSON written by earlier versions of write_values; result stores
+    # (.qres) are read with load_store
     with open(path) as f:
         data = json.load(f)
     return data[0], data[1:]
@@ -14,23 +24,103 @@ def load_edges(path):
         return []
 
 def write_values(path, n_snapshots, y_range, fixed_params, states, metric_dict):
-    results = []    
-    results.append({
-        "Y range": y_range,
-        "Number of snapshots": n_snapshots,
-        "Number of runs" : len(fixed_params[0]),
-        "Fixed parameters": fixed_params
-    })    
-    for i in range(n_snapshots):
-        j = i
-        while j in metric_dict:
-            y = metric_dict[j]
-            results.append({
-            "State": states,
-            "Metric": y
-            })   
-            j += n_snapshots
-            
-    with open(path, "w") as f:
-        json.dump(results, f, indent=4)
+    # key_offset metric dict (or (num_runs * n_snapshots, n_states) array) ->
+    # result store at path; read it back with load_store
+    write_store(path, {"Metric": metric_dict_to_array(metric_dict, n_snapshots)},
+                n_snapshots, fixed_params, y_range, states)
     
+def metric_dict_to_array(metric_dict, n_snapshots):
+    # key_offset dict { run * n_snapshots + snapshot id: values } ->
+    # (num_runs, n_snapshots, n_values) array
+    if isinstance(metric_dict, np.ndarray):
+        values = metric_dict
+    else:
+        values = np.asarray([metric_dict[k] for k in range(len(metric_dict))])
+    return values.reshape(-1, n_snapshots, values.shape[-1])
+
+def write_store(path, metrics, n_snapshots, fixed_params, y_range=None, states=None, orbit=None):
+    # metrics: { name: array with one leading entry per run }
+    # orbit: StateSymmetry.orbit when the metrics hold orbit representatives
+    # only; stored so that readers can expand them without the graph
+    arrays = {name: np.ascontiguousarray(values) for name, values in metrics.items()}
+    header = {
+        "Y range": None if y_range is None else [float(y) for y in y_range],
+        "Number of snapshots": n_snapshots,
+        "Number of runs": len(next(iter(arrays.values()))),
+        "Fixed parameters": np.asarray(fixed_params).tolist(),
+        "Number of wires": None,
+        "arrays": {}
+    }
+    if states is not None:
+        # stored once, as indices; labels are rebuilt on load
+        arrays["states"] = np.array([int(state, 2) for state in states], dtype=np.int64)
+        header["Number of wires"] = len(states[0]) if len(states) else 0
+    if orbit is not None:
+        arrays["orbit"] = np.asarray(orbit, dtype=np.int32)
+        header["Number of wires"] = len(orbit).bit_length() - 1
+
+    offset = 0
+    for name, values in arrays.items():
+        offset = -(-offset // STORE_ALIGN) * STORE_ALIGN
+        header["arrays"][name] = {
+            "dtype": values.dtype.str,
+            "shape": list(values.shape),
+            "offset": offset
+        }
+        offset += values.nbytes
+
+    blob = json.dumps(header).encode()
+    data_start = -(-(16 + len(blob)) // STORE_ALIGN) * STORE_ALIGN
+    blob = blob.ljust(data_start - 16)
+    with tracer.span("write_store") as span:
+        with open(path, "wb") as f:
+            f.write(STORE_MAGIC)
+            f.write(struct.pack("<Q", len(blob)))
+            f.write(blob)
+            for name, values in arrays.items():
+                f.seek(data_start + header["arrays"][name]["offset"])
+                values.tofile(f)
+        span.add("bytes", os.path.getsize(path))
+
+class ResultStore:
+    # read-only view of a write_store file; arrays are slices of one memory
+    # map, so indexing a run / snapshot never copies or parses anything
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            if f.read(len(STORE_MAGIC)) != STORE_MAGIC:
+                raise ValueError(f"{path} is not a QAOA result store")
+            (size,) = struct.unpack("<Q", f.read(8))
+            self.meta = json.loads(f.read(size))
+        self.path = path
+        self.data_start = 16 + size
+        self.buffer = np.memmap(path, dtype=np.uint8, mode="r")
+
+    def names(self):
+        return [name for name in self.meta["arrays"] if name not in ("states", "orbit")]
+
+    def __getitem__(self, name):
+        spec = self.meta["arrays"][name]
+        dtype = np.dtype(spec["dtype"])
+        start = self.data_start + spec["offset"]
+        count = int(np.prod(spec["shape"]))
+        return self.buffer[start:start + count * dtype.itemsize].view(dtype).reshape(spec["shape"])
+
+    def get(self, name, run, snapshot=None):
+        values = self[name][run]
+        return values if snapshot is None else values[snapshot]
+
+    def expand(self, name, run=None, snapshot=None):
+        # full 2^num_wires values of a symmetry-reduced store (one gather)
+        values = self[name] if run is None else self.get(name, run, snapshot)
+        if "orbit" not in self.meta["arrays"]:
+            return values
+        return values[..., self["orbit"]]
+
+    def states(self):
+        if "states" not in self.meta["arrays"]:
+            return None
+        num_wires = self.meta["Number of wires"]
+        return [format(i, f"0{num_wires}b") for i in self["states"]]
+
+def load_store(path):
+    return ResultStore(path)
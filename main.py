@@ -1,8 +1,11 @@
 import sys
 from PyQt5.QtWidgets import QApplication
 from ui.main_window import MainWindow
+from qaoa.trace import enable_from_argv
 
 if __name__ == "__main__":
+    # --trace [path] (or QAOA_TRACE=path): stage timings as a Chrome trace
+    enable_from_argv()
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
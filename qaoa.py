@@ -1,11 +1,23 @@
+import matplotlib
+matplotlib.use("Agg")
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+from matplotlib.colors import to_rgba_array
 from pennylane import numpy as np
 import pennylane as qml
 import numpy as np
-import cmath
 import math
 import json
 import os
+from qaoa.qaoa import get_circuit
+from qaoa.data_processor import DataProcessor, STATE_TICK_LIMIT, bin_states, bin_labels, state_labels, top_k_indices
+from qaoa.symmetry import StateSymmetry
+from qaoa.render import RenderStage
+from qaoa.sweep import sweep_values, sweep_cut_metrics
+from qaoa.optimize import optimize_multistart
+from qaoa.trace import tracer, enable_from_argv
+from data.loader import write_store, metric_dict_to_array
 
 np.random.seed(42)
 output_dir = "./charts" 
@@ -15,7 +27,8 @@ plot_subdirs = [f"{output_dir}/state_probability",
                 f"{output_dir}/state_phase_aggregate",
                 f"{output_dir}/probability_phase",
                 f"{output_dir}/probability_phase_aggregate",
-                f"{output_dir}/heatmap"]
+                f"{output_dir}/heatmap",
+                f"{output_dir}/cut_metrics"]
 os.makedirs(output_dir, exist_ok=True) 
 for path in plot_subdirs:
     os.makedirs(path, exist_ok=True)
@@ -35,49 +48,42 @@ def get_min_max(metric_dict):
         all_values.extend(values)  
     return min(all_values), max(all_values)
 
-def run_qaoa_for_graph(graph, num_layers=1, steps=20, seed=None, params=None):
+def run_qaoa_for_graph(graph, num_layers=1, steps=20, seed=None, params=None, backend="pennylane", n_starts=1):
+    num_wires = max(max(edge) for edge in graph) + 1
+    # multi-start batches run on the adjoint gradient, which only the numpy
+    # engine has
+    if params is None and n_starts > 1 and backend != "numpy":
+        raise ValueError(f"n_starts > 1 needs backend='numpy', got {backend!r}")
+    # numpy backend: no device at all, and training uses the adjoint gradient
+    # (one forward + one backward sweep) instead of parameter shifts
+    with tracer.span("run_qaoa_for_graph.build", args={"backend": backend, "wires": num_wires}):
+        dev, circuit = get_circuit(graph, num_wires, num_layers, backend)
+    # seeded after the pool lookup: building a default.qubit device on a pool
+    # miss draws from the global RNG, which would make results cache-dependent
     if seed is not None:
         np.random.seed(seed)
-        
-    num_wires = max(max(edge) for edge in graph) + 1
-    dev = qml.device("default.qubit", wires=num_wires, shots=None)
-
-    def U_B(beta):
-        for wire in range(num_wires):
-            qml.RX(2 * beta, wires=wire)
-
-    def U_C(gamma):
-        for edge in graph:
-            qml.CNOT(wires=edge)
-            qml.RZ(gamma, wires=edge[1])
-            qml.CNOT(wires=edge)
-            
-    @qml.qnode(dev)
-    def circuit(gammas, betas, return_samples=False):
-        for wire in range(num_wires):
-            qml.Hadamard(wires=wire)
-        # qml.Snapshot()
-        for gamma, beta in zip(gammas, betas):
-            U_C(gamma)
-            qml.Snapshot()
-            U_B(beta)
-            qml.Snapshot()
-        if return_samples:
-            return qml.sample()
-        C = qml.sum(*(qml.Z(w1) @ qml.Z(w2) for w1, w2 in graph))
-        return qml.expval(C)
 
     def objective(params):
         return -0.5 * (len(graph) - circuit(*params))
 
+    if params is None and n_starts > 1:
+        # batched multi-start with early stopping, best start wins
+        with tracer.span("run_qaoa_for_graph.train", starts=n_starts):
+            params = optimize_multistart(graph, num_layers, n_starts, max_steps=steps)["params"]
     if params is None:
-        init_params = 0.01 * np.random.rand(2, num_layers, requires_grad=True)
-        opt = qml.AdagradOptimizer(stepsize=0.5)
-        params = init_params.copy()
-        for _ in range(steps):
-            params = opt.step(objective, params)
-
-    snaps = qml.snapshots(circuit)(*params)
+        with tracer.span("run_qaoa_for_graph.train", steps=steps):
+            init_params = qml.numpy.array(0.01 * np.random.rand(2, num_layers), requires_grad=True)
+            opt = qml.AdagradOptimizer(stepsize=0.5)
+            params = init_params.copy()
+            grad_fn = circuit.objective_grad if backend == "numpy" else None
+            for _ in range(steps):
+                params = opt.step(objective, params, grad_fn=grad_fn)
+
+    with tracer.span("run_qaoa_for_graph.snapshots", runs=1, amplitudes=2 * num_layers * 2 ** num_wires):
+        if backend == "numpy":
+            snaps = circuit.snapshots(*params)
+        else:
+            snaps = qml.snapshots(circuit)(*params)
     return circuit, params, snaps
 
 def prepare_fig(metric_dict, num_plots,  y_label, y_range_bool, sharey=True):
@@ -104,8 +110,30 @@ def prepare_fig(metric_dict, num_plots,  y_label, y_range_bool, sharey=True):
 
     return fig, axes, y_range
 
+def plot_state_series(ax, states, series, labels, color=None, marker=None):
+    # one line per series over the states; past STATE_TICK_LIMIT states the
+    # axis is binned instead: min-max band and mean line per bin, no
+    # per-state ticks, so time and file size stay bounded
+    if len(states) <= STATE_TICK_LIMIT:
+        for y, label in zip(series, labels):
+            ax.plot(states, y, color=color, linestyle='-', marker=marker, label=label)
+        ax.set_xticks(range(len(states)))
+        ax.set_xticklabels(states, rotation=90)
+        return
+    # columns may be top-k or orbit-ordered, so bins are labelled with their
+    # first…last state (as in the HTML plots), not with column positions
+    edges, binned = bin_states(np.asarray(series, dtype=float))
+    centers = (edges[:-1] + edges[1:] - 1) / 2
+    for k, label in enumerate(labels):
+        line, = ax.plot(centers, binned["mean"][k], color=color, marker=marker, label=label)
+        ax.fill_between(centers, binned["min"][k], binned["max"][k], color=line.get_color(), alpha=0.2, linewidth=0)
+    ax.set_xlim(0, len(states) - 1)
+    ax.set_xticks(centers)
+    ax.set_xticklabels(bin_labels(edges, [str(state) for state in states]), rotation=90, fontsize="x-small")
+    ax.set_xlabel(f"state ({len(edges) - 1} bins)")
+
 def state_metric_aggregate(file_path, states, metric_dict, n_snapshots,
-                                            fixed_params, y_label, y_range_bool=True):
+                                            fixed_params, y_label, y_range_bool=True, orbit=None):
     fig, axes, y_range = prepare_fig(
         metric_dict=metric_dict,
         num_plots=n_snapshots,
@@ -113,33 +141,27 @@ def state_metric_aggregate(file_path, states, metric_dict, n_snapshots,
         y_range_bool=y_range_bool
     )
 
-    results = []    
-    results.append({
-        "Y range": y_range,
-        "Period" : len(fixed_params),
-        "Fixed parameters": list(fixed_params)
-    })
     for i in range(n_snapshots):
         ax = axes[i]
         j = i
-        series_num = 0
+        series, labels = [], []
         while j in metric_dict:
-            y = metric_dict[j]
-            results.append({
-            "State": states,
-            "Metric": y
-            })        
-            ax.plot(states, y, label=f"γ,β={abs(round(fixed_params[series_num], 3))}") 
+            series.append(metric_dict[j])
+            labels.append(f"γ,β={abs(round(fixed_params[len(labels)], 3))}")
             # !!!!!!!!!!!!!!!!!!
             j += n_snapshots
-            series_num += 1
 
-        ax.set_xticks(range(len(states)))
-        ax.set_xticklabels(states, rotation=90)
+        plot_state_series(ax, states, series, labels)
         ax.legend()
     
-    with open(file_path.replace("svg", "json"), "w") as f:
-        json.dump(results, f, indent=4)
+    # (num_runs, n_snapshots, n_states), states stored once
+    # orbit: StateSymmetry.orbit, to store one column per orbit (its smallest
+    # state); ResultStore.expand restores every state
+    values = metric_dict_to_array(metric_dict, n_snapshots)
+    if orbit is not None:
+        values = values[..., np.unique(orbit, return_index=True)[1]]
+    write_store(file_path.replace("svg", "qres"), {y_label: values},
+                n_snapshots, fixed_params, y_range, states, orbit)
 
     fig.suptitle(y_label)
     fig.tight_layout()
@@ -157,9 +179,7 @@ def state_metric(file_path, states, metric_dict, y_label,
     )
 
     for ax, (label, values) in zip(axes, metric_dict.items()):
-        ax.plot(states, list(values), color=line_color, linestyle='-', marker='o')
-        ax.set_xticks(range(len(states)))
-        ax.set_xticklabels(states, rotation=90)
+        plot_state_series(ax, states, [values], [None], color=line_color, marker='o')
         ax.set_title(label)
 
     fig.suptitle(y_label)
@@ -168,30 +188,30 @@ def state_metric(file_path, states, metric_dict, y_label,
     plt.savefig(file_path, dpi=300, format=file_path.split('.')[-1])
     plt.close(fig)
     
-def from_snapshot_to_values(snaps, save_json=False):
+def from_snapshot_to_values(snaps, save_json=False, save_store=False, symmetry=None):
      # dict size: 
      # there are "n_snapshots" keys
      # for each snapshot, there are "2^num_wires" values 
-    probs = dict() # { snapshot id: list of probabilities }
-    phases = dict()   
-    for i in range(len(snaps)-1):
-        probs[i] = []
-        phases[i] = []
-        for n in snaps[i]:
-            p = np.abs(n)**2 # For complex input the absolute value is rad(a^2+b^2)     
-            probs[i].append((p.tolist()))
-            phases[i].append(cmath.phase(n))
+     # (one per orbit with a StateSymmetry; DataProcessor.expand restores them)
+    dp = DataProcessor(snaps, symmetry=symmetry)
+    probs, phases = dp.get_values_from_snaps() # { snapshot id: list of probabilities }
             
-    # print(f"Probs: {probs}")
-    # print(f"Phases: {phases}")
     if save_json:
         results = []
         results.append({
             "Probabilities": probs,
             "Phases": phases,
         })
+        if symmetry is not None:
+            results[0]["Representatives"] = symmetry.representatives.tolist()
+            results[0]["Orbit"] = symmetry.orbit.tolist()
         with open(f"{output_dir}/probability_phase.json", "w") as f:
             json.dump(results, f, indent=4)
+    if save_store:
+        write_store(f"{output_dir}/probability_phase.qres", {
+            "Probability": metric_dict_to_array(probs, len(probs)),
+            "Phase": metric_dict_to_array(phases, len(phases))
+        }, len(probs), [], orbit=None if symmetry is None else symmetry.orbit)
             
     return probs, phases
 
@@ -226,16 +246,13 @@ def probability_phase(file_path, states, probs_list, phases_list):
         ax = axes[i]
         x = probs_list[i]
         y = phases_list[i]
-        colors = ['green', 'red']
+        colors = np.array(['green', 'red'])[np.arange(len(x) - 1) % 2]
 
-        for j in range(len(x) - 1):
-            ax.annotate(
-                '',
-                xy=(x[j + 1], y[j + 1]),
-                xytext=(x[j], y[j]),
-                arrowprops=dict(arrowstyle='->', color=colors[j % 2])
-            )
-            ax.plot(x[j], y[j], 'o', color=colors[j % 2])
+        # all steps of the trajectory as one quiver and one scatter
+        x, y = np.asarray(x), np.asarray(y)
+        ax.quiver(x[:-1], y[:-1], np.diff(x), np.diff(y), color=colors,
+                  angles='xy', scale_units='xy', scale=1, width=0.004)
+        ax.scatter(x[:-1], y[:-1], color=colors)
 
         ax.plot(x[0], y[0], 'o', color='yellow', markersize=8, markeredgecolor='black', label='Start')
         ax.plot(x[-1], y[-1], 'o', color='orange', markersize=8, markeredgecolor='black', label='End')
@@ -258,127 +275,183 @@ def probability_phase(file_path, states, probs_list, phases_list):
 def probability_phase_aggregate(file_path, states, probs_list, phases_list, fixed_params):
     n_snapshots = len(fixed_params)
     fig, axes, x_range, y_range = prepare_prob_phase_fig(states, probs_list, phases_list)
-    
-    results = []  
-    
+    # rows are run-major: (num_runs, n_states, number of snapshots)
+    shape = (n_snapshots, len(states), -1)
+    probs, phases = np.asarray(probs_list).reshape(shape), np.asarray(phases_list).reshape(shape)
+    cycle = plt.rcParams["axes.prop_cycle"].by_key()["color"]
+    colors = to_rgba_array([cycle[j % len(cycle)] for j in range(n_snapshots)])
+    # legend entries of the runs, shared by every axis
+    run_handles = [Line2D([], [], color=colors[j], label=round(fixed_params[j], 3)) for j in range(n_snapshots)]
+
     for i, state in enumerate(states):
         ax = axes[i]
-        values = []
-        for j in range(n_snapshots):
-            idx = i + len(states) * j
-            x = probs_list[idx]
-            y = phases_list[idx]
-            values.append({
-            "Probability": list(x),
-            "Phase": list(y)
-            })   
-            ax.plot(x, y, '<-', label=round(fixed_params[j], 3))
-
-            ax.plot(x[0], y[0], 'o', color='yellow', markersize=8, markeredgecolor='black', label='Start' if j == 0 else "")
-            ax.plot(x[-1], y[-1], 'o', color='orange', markersize=8, markeredgecolor='black', label='End' if j == 0 else "")
-        results.append({
-            "State": state,
-            "Values": values})
+        # every run of the state as one LineCollection, and one arrowhead per
+        # step (at its midpoint, along its direction) in a single quiver
+        paths = np.stack([probs[:, i], phases[:, i]], axis=-1)
+        ax.add_collection(LineCollection(paths, colors=colors))
+        starts, steps = paths[:, :-1], np.diff(paths, axis=1)
+        length = np.hypot(steps[..., 0], steps[..., 1])
+        moved = length > 0
+        heads = (starts + steps / 2)[moved]
+        directions = steps[moved] / length[moved][:, None]
+        ax.quiver(heads[:, 0], heads[:, 1], directions[:, 0], directions[:, 1],
+                  color=np.repeat(colors, moved.sum(axis=1), axis=0), angles='xy', pivot='mid',
+                  scale=60, width=0.004, headwidth=5, headlength=5, headaxislength=4.5)
+
+        # start / end markers of every run at once
+        ax.scatter(probs[:, i, 0], phases[:, i, 0],
+                   color='yellow', s=64, edgecolors='black', zorder=3, label='Start')
+        ax.scatter(probs[:, i, -1], phases[:, i, -1],
+                   color='orange', s=64, edgecolors='black', zorder=3, label='End')
 
         ax.plot([], [], color='black', label=f'State {state}')
         ax.set_xlabel('Probability')
         ax.set_ylabel('Phase')
         ax.grid()
-        ax.legend()
+        ax.legend(handles=run_handles + ax.get_legend_handles_labels()[0])
         ax.set_xlim(*x_range)
         ax.set_ylim(*y_range)
 
     for j in range(len(states), len(axes)):
         fig.delaxes(axes[j])
         
-    with open(file_path.replace("svg", "json"), "w") as f:
-        json.dump(results, f, indent=4)
+    write_store(file_path.replace("svg", "qres"), {
+        "Probability": probs,
+        "Phase": phases
+    }, len(probs_list[0]), fixed_params, y_range, states)
 
     plt.tight_layout()
     os.makedirs(os.path.dirname(file_path), exist_ok=True)
     plt.savefig(file_path, dpi=300, format=file_path.split('.')[-1])
     plt.close(fig)
  
-def from_state_to_values(states, snaps, num_wires, save_json=False):
+def from_state_to_values(states, snaps, num_wires, save_json=False, save_store=False):
      # list size: 
-     # 2^num_wires states
+     # 2^num_wires states (or any subset of them)
      # for each state, there are "n_snapshots" values 
-    shape = list_multiplication(2, num_wires)
-    probs_list = []  # [[probabilities for state 0], [probabilities for state 1], ... ]
-    phases_list = []
-    states_list = [[int(bit) for bit in state] for state in states]
-    
-    for state in states_list:
-        probs = np.zeros(len(snaps) - 1)
-        phases = np.zeros(len(snaps) - 1)
-        for i in range(len(snaps) - 1):
-            if len(state) != len(shape):
-                raise ValueError("Wrong shape")
-            amplitude = snaps[i].reshape(*shape)[tuple(state)]
-            probs[i] = np.abs(amplitude) ** 2
-            phases[i] = cmath.phase(amplitude)
-
-        probs_list.append(probs)
-        phases_list.append(phases)
+     # one gather over the (n_snapshots, 2^num_wires) stack for all states
+    if len(snaps[0]) != 2 ** num_wires:
+        raise ValueError("Wrong shape")
+    # [[probabilities for state 0], [probabilities for state 1], ... ]
+    probs_list, phases_list = DataProcessor(snaps).get_values_from_states(states)
         
-        # print(f"State: {state}, Probabilities: {probs}, Phases: {phases}")
     if save_json:
         results = []
-        results.append({
-    "State": state,
-    "Probabilities": probs.tolist(),
-    "Phases": phases.tolist()
-})     
+        for state, probs, phases in zip(states, probs_list, phases_list):
+            results.append({
+                "State": state,
+                "Probabilities": probs.tolist(),
+                "Phases": phases.tolist()
+            })
         with open(f"{output_dir}/probability_phase.json", "w") as f:
             json.dump(results, f, indent=4)
+    if save_store:
+        write_store(f"{output_dir}/probability_phase.qres", {
+            "Probability": probs_list[None],
+            "Phase": phases_list[None]
+        }, probs_list.shape[-1], [], states=states)
         
     return probs_list, phases_list
 
-def collect_states(edges, num_layers, num_wires, states,  gamma_vals = None, beta_vals = None):
-    all_probs, all_phases = [], []
-    for gamma, beta in zip(gamma_vals, beta_vals):
-        circuit, params, snaps = run_qaoa_for_graph(
-            edges, num_layers=num_layers,
-            params=[[gamma] * num_layers, [beta] * num_layers]
-        )
-        probs_list, phases_list = from_state_to_values(states, snaps, num_wires)
-        all_probs.extend(probs_list)
-        all_phases.extend(phases_list)
-    return all_probs, all_phases
-
-def collect_snapshots(edges, num_layers, gamma_vals=None, beta_vals=None):
-    all_probs, all_phases = {}, {}
-    key_offset, n_snapshots = 0, 0
+def run_sweep(edges, num_layers, gamma_vals, beta_vals, backend="pennylane"):
+    # yields the snapshots of every (gamma, beta) run, in order
     for gamma, beta in zip(gamma_vals, beta_vals):
         circuit, params, snaps = run_qaoa_for_graph(
             edges, num_layers=num_layers,
             params=[[gamma] * num_layers, [beta] * num_layers]
         )
-        probs_dict, phases_dict = from_snapshot_to_values(snaps)
-        n_snapshots = len(probs_dict)
-        for k, v in probs_dict.items():
-            all_probs[key_offset + k] = v
-        for k, v in phases_dict.items():
-            all_phases[key_offset + k] = v
-        key_offset += n_snapshots
-    return all_probs, all_phases, n_snapshots
-    
+        yield snaps
+
+def state_rows(values):
+    # (n_runs, n_snapshots, n_states) -> one row per (run, state)
+    return list(np.swapaxes(values, 1, 2).reshape(-1, values.shape[1]))
+
+def collect_states(edges, num_layers, num_wires, states,  gamma_vals = None, beta_vals = None, backend="pennylane", workers=1):
+    with tracer.span("collect_states", runs=len(gamma_vals), states=len(states)):
+        if backend == "numpy":
+            probs, phases = sweep_values(edges, num_layers, gamma_vals, beta_vals, states, num_wires, workers)
+            return state_rows(probs), state_rows(phases)
+        all_probs, all_phases = [], []
+        for snaps in run_sweep(edges, num_layers, gamma_vals, beta_vals, backend):
+            probs_list, phases_list = from_state_to_values(states, snaps, num_wires)
+            all_probs.extend(probs_list)
+            all_phases.extend(phases_list)
+        return all_probs, all_phases
+
+def collect_snapshot_arrays(edges, num_layers, gamma_vals=None, beta_vals=None, backend="pennylane", workers=1, symmetry=False):
+    # probabilities / phases of a whole sweep as (n_runs, n_snapshots, n_values)
+    # arrays, no Python lists; with symmetry=True (numpy backend) n_values is
+    # the number of orbits, otherwise 2^num_wires
+    with tracer.span("collect_snapshot_arrays", runs=len(gamma_vals)) as span:
+        if backend == "numpy":
+            probs, phases = sweep_values(edges, num_layers, gamma_vals, beta_vals, workers=workers, symmetry=symmetry)
+        else:
+            runs = [DataProcessor(snaps, as_arrays=True).get_values_from_snaps()
+                    for snaps in run_sweep(edges, num_layers, gamma_vals, beta_vals, backend)]
+            probs, phases = np.stack([p for p, _ in runs]), np.stack([ph for _, ph in runs])
+        span.add("amplitudes", probs.size)
+        return probs, phases
+
+def collect_snapshots(edges, num_layers, gamma_vals=None, beta_vals=None, backend="pennylane", workers=1, symmetry=False):
+    # key_offset + snapshot id dicts of every state; symmetry: the sweep
+    # computes and moves orbit representatives only, expanded here for plotting
+    probs, phases = collect_snapshot_arrays(edges, num_layers, gamma_vals, beta_vals, backend, workers, symmetry)
+    if symmetry and backend == "numpy":
+        orbits = StateSymmetry.for_graph(edges)
+        probs, phases = orbits.expand(probs), orbits.expand(phases)
+    n_snapshots = probs.shape[1]
+    return (dict(enumerate(probs.reshape(-1, probs.shape[-1]).tolist())),
+            dict(enumerate(phases.reshape(-1, phases.shape[-1]).tolist())), n_snapshots)
+
+def select_top_k(probs, k, num_wires, orbit=None):
+    # labels of the k most probable basis states (peak over runs and
+    # snapshots) and the matching columns of probs; with an orbit map probs
+    # holds orbit representatives, and only the peak vector is expanded
+    peak = probs.reshape(-1, probs.shape[-1]).max(axis=0)
+    if orbit is not None:
+        peak = peak[orbit]
+    indices = top_k_indices(peak, k)
+    columns = indices if orbit is None else orbit[indices]
+    return state_labels(indices, num_wires), columns
+
 def run_plot_engine(
     filename, num_layers, num_wires, edges, states,
      gamma_vals=None, beta_vals=None, aggregate=False,
     from_snapshot_to_values_bool=False,
-    from_state_to_values_bool=False
+    from_state_to_values_bool=False,
+    backend="pennylane",
+    workers=1,
+    top_k=None,
+    symmetry=False
 ):
+    # workers > 1 shards the sweep across processes (numpy backend)
+    # top_k: plot only the k most probable states; states may then be None
+    # symmetry: simulate / store orbit representatives only (numpy backend)
     # if gamma_vals is not None and beta_vals is not None:
+    with tracer.span("run_plot_engine", args={"backend": backend, "wires": num_wires, "layers": num_layers}):
         if from_snapshot_to_values_bool:
             if aggregate:
-                all_probs, all_phases, n_snapshots = collect_snapshots(edges, num_layers, gamma_vals, beta_vals)
-                state_metric_aggregate(
-                    f"{plot_subdirs[2]}/{plot_subdirs[2].split('/')[-1]}.svg", states, all_probs, n_snapshots, gamma_vals, plot_subdirs[2].split('_')[1]
-                )
-                state_metric_aggregate(
-                    f"{plot_subdirs[3]}/{plot_subdirs[3].split('/')[-1]}.svg", states, all_phases, n_snapshots, gamma_vals, plot_subdirs[3].split('_')[1]
-                )
+                # one streamed sweep into arrays; only the plotted columns
+                # (top k, or every state) become Python lists
+                probs, phases = collect_snapshot_arrays(edges, num_layers, gamma_vals, beta_vals, backend, workers, symmetry)
+                orbit = StateSymmetry.for_graph(edges).orbit if symmetry and backend == "numpy" else None
+                if top_k is not None:
+                    states, columns = select_top_k(probs, top_k, num_wires, orbit)
+                    probs, phases, orbit = probs[..., columns], phases[..., columns], None
+                elif orbit is not None:
+                    probs, phases = probs[..., orbit], phases[..., orbit]
+                n_snapshots = probs.shape[1]
+                all_probs = dict(enumerate(probs.reshape(-1, probs.shape[-1]).tolist()))
+                all_phases = dict(enumerate(phases.reshape(-1, phases.shape[-1]).tolist()))
+                # both figures rendered in parallel, skipped when their inputs are unchanged
+                render = RenderStage(workers)
+                for subdir, metric_dict in ((plot_subdirs[2], all_probs), (plot_subdirs[3], all_phases)):
+                    file_path = f"{subdir}/{subdir.split('/')[-1]}.svg"
+                    render.submit(
+                        state_metric_aggregate, file_path, states, metric_dict, n_snapshots, gamma_vals, subdir.split('_')[1],
+                        orbit=orbit, outputs=[file_path, file_path.replace("svg", "qres")]
+                    )
+                render.run()
             # else: 
             #     circuit, params, snaps = run_qaoa_for_graph(edges, num_layers=num_layers, params=gamma_vals)
             #     probs, phases = from_snapshot_to_values(snaps)
@@ -387,14 +460,56 @@ def run_plot_engine(
                 
         elif from_state_to_values_bool:
             if aggregate:
-                all_probs, all_phases = collect_states(edges, num_layers, num_wires, states,  gamma_vals, beta_vals)
-                probability_phase_aggregate(f"{plot_subdirs[5]}/{plot_subdirs[5].split('/')[-1]}.svg", states, all_probs, all_phases, gamma_vals)
+                if top_k is not None:
+                    # one sweep: the states are picked from its own
+                    # probabilities, then only their columns are kept
+                    probs, phases = collect_snapshot_arrays(edges, num_layers, gamma_vals, beta_vals, backend, workers, symmetry)
+                    orbit = StateSymmetry.for_graph(edges).orbit if symmetry and backend == "numpy" else None
+                    states, columns = select_top_k(probs, top_k, num_wires, orbit)
+                    all_probs, all_phases = state_rows(probs[..., columns]), state_rows(phases[..., columns])
+                else:
+                    all_probs, all_phases = collect_states(edges, num_layers, num_wires, states,  gamma_vals, beta_vals, backend, workers)
+                file_path = f"{plot_subdirs[5]}/{plot_subdirs[5].split('/')[-1]}.svg"
+                render = RenderStage(workers)
+                render.submit(probability_phase_aggregate, file_path, states, all_probs, all_phases, gamma_vals,
+                              outputs=[file_path, file_path.replace("svg", "qres")])
+                render.run()
             # else:
             #     circuit, params, snaps = run_qaoa_for_graph(edges, num_layers=num_layers, params=gamma_vals)
             #     probs, phases = from_state_to_values(states, snaps, num_wires)
             #     probability_phase(f"{plot_subdirs[4]}/{filename}", states, probs, phases)
 
 
+def energy_landscape(edges, num_layers, gamma_vals, beta_vals, file_path=f"{plot_subdirs[6]}/heatmap.png"):
+    # MaxCut objective (same as objective in run_qaoa_for_graph) on the whole
+    # gamma x beta grid, evaluated as batched statevectors
+    num_wires = max(max(edge) for edge in edges) + 1
+    dev, engine = get_circuit(edges, num_wires, num_layers, "numpy")
+    landscape = -0.5 * (len(edges) - engine.landscape(gamma_vals, beta_vals, num_layers))
+    np.save(file_path.rsplit('.', 1)[0] + ".npy", landscape)
+
+    fig, ax = plt.subplots(figsize=(6, 5))
+    im = ax.imshow(
+        landscape.T, origin="lower", aspect="auto", cmap="viridis",
+        extent=(gamma_vals[0], gamma_vals[-1], beta_vals[0], beta_vals[-1])
+    )
+    fig.colorbar(im, ax=ax, label="objective")
+    ax.set_xlabel("γ")
+    ax.set_ylabel("β")
+    ax.set_title(f"p={num_layers}")
+    fig.tight_layout()
+    plt.savefig(file_path, dpi=300, format=file_path.split('.')[-1])
+    plt.close(fig)
+    return landscape
+
+def cut_metrics(edges, num_layers, gamma_vals, beta_vals, file_path=f"{plot_subdirs[7]}/cut_metrics.qres"):
+    # <C>, approximation ratio, P(optimal cut) and cut distribution for every
+    # snapshot of every (gamma, beta) run
+    metrics = sweep_cut_metrics(edges, num_layers, gamma_vals, beta_vals)
+    n_snapshots = metrics["expectation"].shape[1]
+    write_store(file_path, metrics, n_snapshots, gamma_vals, y_range=(0, 1))
+    return metrics
+
 # def test_gamma_beta_incremental(num_layers, num_wires, edges, states):
 #     gamma_vals = -np.arange(0.01, 0.09, 0.01)
 #     beta_vals  =  np.arange(0.01, 0.09, 0.01)
@@ -404,14 +519,16 @@ def run_plot_engine(
 #             run_plot_engine(f"example_graph{i}.svg", num_layers, num_wires, edges, states, params, None, aggregate=False, from_snapshot_to_values_bool=True)
 #             run_plot_engine(f"example_graph{i}.svg", num_layers, num_wires, edges, states, params, None, aggregate=False, from_state_to_values_bool=True)
 
-def test_gamma_beta_aggregate_incremental(num_layers, num_wires, edges, states):
+def test_gamma_beta_aggregate_incremental(num_layers, num_wires, edges, states, top_k=None):
     gamma_vals = -np.arange(0.01, 0.09, 0.01)
     beta_vals  =  np.arange(0.01, 0.09, 0.01)
     if len(gamma_vals) == len(beta_vals):
-        run_plot_engine(f"example_graph.svg", num_layers, num_wires, edges, states, gamma_vals, beta_vals, aggregate=True, from_snapshot_to_values_bool=True)    
-        run_plot_engine(f"example_graph.svg", num_layers, num_wires, edges, states, gamma_vals, beta_vals, aggregate=True, from_state_to_values_bool=True)
+        run_plot_engine(f"example_graph.svg", num_layers, num_wires, edges, states, gamma_vals, beta_vals, aggregate=True, from_snapshot_to_values_bool=True, top_k=top_k)    
+        run_plot_engine(f"example_graph.svg", num_layers, num_wires, edges, states, gamma_vals, beta_vals, aggregate=True, from_state_to_values_bool=True, top_k=top_k)
     
 if __name__ == "__main__":
+    # --trace [path] (or QAOA_TRACE=path): stage timings as a Chrome trace
+    enable_from_argv()
     num_layers = 2
     edges = []
     nodes = set()
@@ -423,7 +540,11 @@ if __name__ == "__main__":
             nodes.add(node1)
             nodes.add(node2)
     num_wires = len(nodes)
-    states = [format(i, f'0{num_wires}b') for i in range(2 ** num_wires)]   
+    # all 2^num_wires states only while that stays plottable, top-k beyond
+    top_k = None if num_wires <= 4 else 16
+    states = None if top_k else [format(i, f'0{num_wires}b') for i in range(2 ** num_wires)]   
     # test_gamma_beta_incremental(num_layers, num_wires, edges, states)
-    test_gamma_beta_aggregate_incremental(num_layers, num_wires, edges, states)
+    test_gamma_beta_aggregate_incremental(num_layers, num_wires, edges, states, top_k)
+    energy_landscape(edges, num_layers, np.linspace(-np.pi, np.pi, 100), np.linspace(-np.pi / 2, np.pi / 2, 100))
+    cut_metrics(edges, num_layers, -np.arange(0.01, 0.09, 0.01), np.arange(0.01, 0.09, 0.01))
 
@@ -0,0 +1,107 @@
+from collections import Counter
+import numpy as np
+from data.loader import load_edges
+from qaoa.statevector import StatevectorQAOA
+
+# Closed-form p=1 QAOA for MaxCut (Wang, Hadfield, Jiang, Rieffel 2018),
+# written in this repo's conventions: U_C = exp(-i gamma/2 sum Z_u Z_v),
+# U_B = exp(-i beta sum X). For an edge (u, v) with d = deg(u) - 1,
+# e = deg(v) - 1 and f triangles through the edge:
+#
+#   <Z_u Z_v> = 1/2 sin(4b) sin(g) (cos^d(g) + cos^e(g))
+#             + 1/2 sin^2(2b) cos^(d+e-2f)(g) (1 - cos^f(2g))
+#
+# Only the degrees and triangle counts are needed, never a statevector.
+
+def adjacency(graph):
+    # sparse adjacency: node -> set of neighbours
+    adj = dict()
+    for (u, v) in graph:
+        if u == v:
+            continue
+        adj.setdefault(u, set()).add(v)
+        adj.setdefault(v, set()).add(u)
+    return adj
+
+def dpower(x, k):
+    # d/dx x^k, without 0 * x^-1 when k == 0
+    return np.where(k > 0, k * x ** np.maximum(k - 1, 0), 0.0)
+
+class AnalyticMaxCutP1:
+    def __init__(self, graph):
+        self.graph = graph
+        self.adjacency = adjacency(graph)
+        edges = sorted({tuple(sorted(edge)) for edge in graph if edge[0] != edge[1]})
+        self.edges = edges
+        # (d, e, f) per edge
+        self.terms = np.array([
+            (len(self.adjacency[u]) - 1, len(self.adjacency[v]) - 1,
+             len(self.adjacency[u] & self.adjacency[v]))
+            for (u, v) in edges
+        ], dtype=np.int64).reshape(-1, 3)
+        # edges sharing (d, e, f) have the same <ZZ>: evaluate each class once
+        signatures = Counter((min(d, e), max(d, e), f) for d, e, f in self.terms)
+        self.signatures = np.array(list(signatures.keys()), dtype=np.int64).reshape(-1, 3)
+        self.counts = np.array(list(signatures.values()), dtype=float)
+
+    @classmethod
+    def from_file(cls, path):
+        return cls(load_edges(path))
+
+    def _parts(self, gamma, terms):
+        # A = sin(g)(cos^d + cos^e), B = cos^(d+e-2f)(1 - cos^f(2g)) and their
+        # gamma derivatives; gamma has shape (...), terms (n, 3) -> (..., n)
+        g = np.asarray(gamma, dtype=float)[..., None]
+        d, e, f = terms[:, 0], terms[:, 1], terms[:, 2]
+        k = d + e - 2 * f
+        c, s, c2 = np.cos(g), np.sin(g), np.cos(2 * g)
+        a = s * (c ** d + c ** e)
+        da = c * (c ** d + c ** e) - s * s * (dpower(c, d) + dpower(c, e))
+        b = c ** k * (1 - c2 ** f)
+        db = (-s * dpower(c, k) * (1 - c2 ** f)
+              + c ** k * 2 * np.sin(2 * g) * dpower(c2, f))
+        return a, da, b, db
+
+    def edge_zz(self, gamma, beta):
+        # <Z_u Z_v> for every edge of self.edges, shape (..., n_edges)
+        a, _, b, _ = self._parts(gamma, self.terms)
+        beta = np.asarray(beta, dtype=float)[..., None]
+        return 0.5 * np.sin(4 * beta) * a + 0.5 * np.sin(2 * beta) ** 2 * b
+
+    def expval(self, gamma, beta):
+        # <sum Z_u Z_v>, broadcast over gamma / beta arrays
+        a, _, b, _ = self._parts(gamma, self.signatures)
+        beta = np.asarray(beta, dtype=float)[..., None]
+        zz = 0.5 * np.sin(4 * beta) * a + 0.5 * np.sin(2 * beta) ** 2 * b
+        return zz @ self.counts
+
+    def objective(self, gamma, beta):
+        # same as QAOAMaxCut.objective: minus the expected cut
+        return -0.5 * (len(self.edges) - self.expval(gamma, beta))
+
+    def cut_expectation(self, gamma, beta):
+        return -self.objective(gamma, beta)
+
+    def gradient(self, gamma, beta):
+        # (d objective / d gamma, d objective / d beta)
+        a, da, b, db = self._parts(gamma, self.signatures)
+        beta = np.asarray(beta, dtype=float)[..., None]
+        dgamma = 0.5 * np.sin(4 * beta) * da + 0.5 * np.sin(2 * beta) ** 2 * db
+        dbeta = 2 * np.cos(4 * beta) * a + np.sin(4 * beta) * b
+        return 0.5 * (dgamma @ self.counts), 0.5 * (dbeta @ self.counts)
+
+    def landscape(self, gamma_vals, beta_vals):
+        # objective on the gamma x beta grid, shape (len(gamma_vals), len(beta_vals))
+        # <ZZ> is separable in gamma and beta, so the gamma part is evaluated
+        # once per gamma value and the grid is two outer products
+        a, _, b, _ = self._parts(gamma_vals, self.signatures)
+        beta = np.asarray(beta_vals, dtype=float)
+        expval = (0.5 * np.outer(a @ self.counts, np.sin(4 * beta))
+                  + 0.5 * np.outer(b @ self.counts, np.sin(2 * beta) ** 2))
+        return -0.5 * (len(self.edges) - expval)
+
+    def cross_check(self, gamma_vals, beta_vals):
+        # max deviation from the statevector simulator (small graphs only)
+        engine = StatevectorQAOA(self.edges)
+        simulated = -0.5 * (len(self.edges) - engine.landscape(gamma_vals, beta_vals))
+        return float(np.abs(self.landscape(gamma_vals, beta_vals) - simulated).max())
@@ -1,28 +1,137 @@
-import cmath 
 import numpy as np
+from qaoa.trace import tracer
+
+def state_indices(states, num_wires):
+    # bitstrings -> basis-state indices (wire 0 is the most significant bit)
+    for state in states:
+        if len(state) != num_wires:
+            raise ValueError("Wrong shape")
+    return np.array([int(state, 2) for state in states], dtype=np.int64)
+
+def state_labels(indices, num_wires):
+    # basis-state indices -> bitstrings, built only for the given indices
+    return [format(int(i), f'0{num_wires}b') for i in indices]
+
+def top_k_indices(probs, k, per_snapshot=False):
+    # probs: (..., 2^num_wires). Returns the selected basis states in
+    # ascending index order, so the x axis keeps the usual state order.
+    # per_snapshot=False: the k states with the highest probability in any
+    # snapshot; per_snapshot=True: union of every snapshot's own top k
+    probs = np.asarray(probs)
+    rows = probs.reshape(-1, probs.shape[-1])
+    k = min(k, rows.shape[-1])
+    if per_snapshot:
+        top = np.argpartition(rows, -k, axis=-1)[:, -k:]
+        return np.unique(top)
+    peak = rows.max(axis=0)
+    return np.sort(np.argpartition(peak, -k)[-k:])
+
+# above this many states plots switch from one tick / marker per state to
+# STATE_BINS bins of consecutive basis states
+STATE_TICK_LIMIT = 64
+STATE_BINS = 64
+
+def bin_states(values, n_bins=STATE_BINS):
+    # (..., n_states) -> bin edges and the min / max / mean of every bin of
+    # consecutive states, each (..., n_bins)
+    values = np.asarray(values)
+    n_states = values.shape[-1]
+    edges = np.unique(np.linspace(0, n_states, min(n_bins, n_states) + 1).astype(np.int64))
+    starts = edges[:-1]
+    return edges, {
+        "min": np.minimum.reduceat(values, starts, axis=-1),
+        "max": np.maximum.reduceat(values, starts, axis=-1),
+        "mean": np.add.reduceat(values, starts, axis=-1) / np.diff(edges)
+    }
+
+def bin_labels(edges, states=None, num_wires=None):
+    # "first…last" label per bin, from the given labels or built from indices
+    if states is not None:
+        return [f"{states[lo]}…{states[hi - 1]}" for lo, hi in zip(edges[:-1], edges[1:])]
+    return [f"{format(int(lo), f'0{num_wires}b')}…{format(int(hi) - 1, f'0{num_wires}b')}"
+            for lo, hi in zip(edges[:-1], edges[1:])]
 
 class DataProcessor:
-    def __init__(self, snaps):
+    def __init__(self, snaps, as_arrays=False, dtype=np.float64, symmetry=None):
+        # snaps: qml.snapshots-style dict, or a (n_snapshots, 2^num_wires) /
+        # (n_runs, n_snapshots, 2^num_wires) array from run_batch
+        # symmetry: a StateSymmetry; values are then kept for orbit
+        # representatives only (see expand)
         self.snaps = snaps
+        self.as_arrays = as_arrays
+        self.dtype = dtype
+        self.symmetry = symmetry
+
+    def get_snapshot_stack(self):
+        # (n_snapshots, 2^num_wires) complex array; batches are flattened run
+        # by run, so row k is the same snapshot as key k of the key_offset dicts
+        if isinstance(self.snaps, dict):
+            return np.stack([self.snaps[i] for i in range(len(self.snaps)-1)])
+        snaps = np.asarray(self.snaps)
+        return snaps.reshape(-1, snaps.shape[-1])
+
+    def get_arrays_from_snaps(self):
+        # contiguous (n_snapshots, 2^num_wires) arrays of probabilities and phases
+        with tracer.span("DataProcessor.get_arrays_from_snaps") as span:
+            stack = self.get_snapshot_stack()
+            if self.symmetry is not None:
+                stack = self.symmetry.reduce(stack)
+            probs = np.ascontiguousarray(np.abs(stack) ** 2, dtype=self.dtype)
+            phases = np.ascontiguousarray(np.angle(stack), dtype=self.dtype)
+            span.add("amplitudes", stack.size)
+            return probs, phases
 
     def get_values_from_snaps(self):
         # dict size: 
         # there are "n_snapshots" keys
         # for each snapshot, there are "2^num_wires" values 
-        probs = dict() # { snapshot id: list of probabilities }
-        phases = dict()   
-        for i in range(len(self.snaps)-1):
-            probs[i] = []
-            phases[i] = []
-            for n in self.snaps[i]:
-                p = np.abs(n)**2 # For complex input the absolute value is rad(a^2+b^2)     
-                probs[i].append((p.tolist()))
-                phases[i].append(cmath.phase(n))
-        # print(f"Probs: {probs}")
-        # print(f"Phases: {phases}")
-        return probs, phases 
+        probs, phases = self.get_arrays_from_snaps()
+        if self.as_arrays:
+            return probs, phases
+        # { snapshot id: list of probabilities }
+        with tracer.span("DataProcessor.to_lists", values=probs.size + phases.size):
+            return dict(enumerate(probs.tolist())), dict(enumerate(phases.tolist()))
     
+    def get_values_from_states(self, states):
+        # list size:
+        # one row per requested state (any subset of the 2^num_wires states)
+        # for each state, there are "n_snapshots" values
+        # a run_batch array gives n_runs * len(states) rows, run by run
+        if isinstance(self.snaps, dict):
+            snaps = self.get_snapshot_stack()[None]
+        else:
+            snaps = np.asarray(self.snaps)
+            snaps = snaps.reshape(-1, *snaps.shape[-2:])
+        with tracer.span("DataProcessor.get_values_from_states") as span:
+            num_wires = snaps.shape[-1].bit_length() - 1
+            idx = state_indices(states, num_wires)
+            amplitudes = np.swapaxes(snaps[..., idx], 1, 2).reshape(-1, snaps.shape[1])
+            probs = np.ascontiguousarray(np.abs(amplitudes) ** 2, dtype=self.dtype)
+            phases = np.ascontiguousarray(np.angle(amplitudes), dtype=self.dtype)
+            span.add("amplitudes", amplitudes.size)
+            return probs, phases
+
+    def get_top_k_states(self, metric_dict, k, per_snapshot=False):
+        # (indices, bitstring labels) of the most probable states; metric_dict
+        # is a probability dict / array with one row per snapshot and one
+        # column per basis state (expand() symmetry-reduced values first)
+        if isinstance(metric_dict, dict):
+            metric_dict = np.asarray([metric_dict[i] for i in range(len(metric_dict))])
+        idx = top_k_indices(metric_dict, k, per_snapshot)
+        num_wires = np.shape(metric_dict)[-1].bit_length() - 1
+        return idx, state_labels(idx, num_wires)
+
+    def expand(self, values):
+        # orbit-representative values -> full (..., 2^num_wires) values
+        if self.symmetry is None:
+            return values
+        if isinstance(values, dict):
+            return {k: self.symmetry.expand(v).tolist() for k, v in values.items()}
+        return self.symmetry.expand(values)
+
     def get_min_max(self, metric_dict):
+        if isinstance(metric_dict, np.ndarray):
+            return float(metric_dict.min()), float(metric_dict.max())
         all_values = []
         for values in metric_dict.values():
             all_values.extend(values)  
@@ -35,6 +144,10 @@ class DataProcessor:
     
 
     def get_data_per_layer(self, states, metric_dict, n_snapshots):
+        if isinstance(metric_dict, np.ndarray):
+            # (n_runs * n_snapshots, 2^num_wires) -> view of shape
+            # (n_snapshots, n_runs, 2^num_wires), no copy
+            return metric_dict.reshape(-1, n_snapshots, metric_dict.shape[-1]).swapaxes(0, 1)
         data_per_layer = dict() # key: num_layer, value: list of values
         for i in range(n_snapshots):
             j = i
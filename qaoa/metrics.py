@@ -0,0 +1,58 @@
+from functools import lru_cache
+import numpy as np
+from qaoa.pool import canonical_edges
+
+@lru_cache(maxsize=32)
+def _cut_values(edges, num_wires):
+    idx = np.arange(2 ** num_wires, dtype=np.int64)
+    cuts = np.zeros(2 ** num_wires, dtype=np.int64)
+    for (i, j) in edges:
+        # an edge is cut when its two bits differ (wire 0 is the most significant bit)
+        cuts += ((idx >> (num_wires - 1 - i)) ^ (idx >> (num_wires - 1 - j))) & 1
+    cuts.setflags(write=False)
+    return cuts
+
+def cut_values(graph, num_wires):
+    # cut size of every basis state, length 2^num_wires; cached per canonical
+    # graph and shared, hence read-only
+    return _cut_values(canonical_edges(graph), num_wires)
+
+class CutMetrics:
+    # MaxCut metrics straight from probability arrays of shape (..., 2^num_wires):
+    # every metric is one dot product / bincount over the cached cut vector,
+    # for any number of runs and snapshots at once
+    def __init__(self, graph, num_wires=None):
+        if num_wires is None:
+            num_wires = max(max(edge) for edge in graph) + 1
+        self.num_wires = num_wires
+        self.cuts = cut_values(graph, num_wires)
+        self.max_cut = int(self.cuts.max())
+        self.optimal = np.flatnonzero(self.cuts == self.max_cut)
+
+    def expectation(self, probs):
+        # <C>
+        return np.asarray(probs) @ self.cuts
+
+    def approximation_ratio(self, probs):
+        return self.expectation(probs) / self.max_cut
+
+    def optimal_probability(self, probs):
+        # probability of measuring any maximum cut
+        return np.asarray(probs)[..., self.optimal].sum(axis=-1)
+
+    def distribution(self, probs):
+        # probability of every cut size 0..max_cut, shape (..., max_cut + 1)
+        probs = np.asarray(probs)
+        rows = probs.reshape(-1, probs.shape[-1])
+        bins = self.max_cut + 1
+        offsets = np.arange(len(rows))[:, None] * bins + self.cuts
+        dist = np.bincount(offsets.ravel(), weights=rows.ravel(), minlength=len(rows) * bins)
+        return dist.reshape(*probs.shape[:-1], bins)
+
+    def all(self, probs):
+        return {
+            "expectation": self.expectation(probs),
+            "approximation_ratio": self.approximation_ratio(probs),
+            "optimal_probability": self.optimal_probability(probs),
+            "distribution": self.distribution(probs)
+        }
@@ -0,0 +1,81 @@
+import numpy as np
+from qaoa.statevector import StatevectorQAOA
+
+class MultiStartAdagrad:
+    # Adagrad (same update as qml.AdagradOptimizer) on many starting points at
+    # once: all active starts form one (n_active, num_layers) batch for the
+    # adjoint gradient, and a start leaves the batch as soon as it converges
+    def __init__(self, stepsize=0.5, eps=1e-8, tol=1e-6, patience=5, max_steps=200):
+        self.stepsize = stepsize
+        self.eps = eps
+        self.tol = tol
+        self.patience = patience
+        self.max_steps = max_steps
+
+    def run(self, engine, gammas, betas):
+        # gammas, betas: (n_starts, num_layers) initial parameters
+        gammas = np.array(gammas, dtype=float)
+        betas = np.array(betas, dtype=float)
+        n_starts = len(gammas)
+        acc_g, acc_b = np.zeros_like(gammas), np.zeros_like(betas)
+        best = np.full(n_starts, np.inf)
+        stall = np.zeros(n_starts, dtype=int)
+        steps = np.zeros(n_starts, dtype=int)
+        traces = [[] for _ in range(n_starts)]
+        active = np.arange(n_starts)
+
+        for _ in range(self.max_steps):
+            if len(active) == 0:
+                break
+            objective, dg, db = engine.objective_and_grad(gammas[active], betas[active])
+            for start, value in zip(active, objective):
+                traces[start].append(float(value))
+
+            # plateau: no improvement larger than tol for `patience` steps
+            improved = objective < best[active] - self.tol
+            stall[active] = np.where(improved, 0, stall[active] + 1)
+            best[active] = np.minimum(best[active], objective)
+            # converged: gradient vanished
+            flat = np.sqrt(np.sum(dg ** 2, axis=1) + np.sum(db ** 2, axis=1)) < self.tol
+            done = flat | (stall[active] >= self.patience)
+
+            keep = ~done
+            rows = active[keep]
+            acc_g[rows] += dg[keep] ** 2
+            acc_b[rows] += db[keep] ** 2
+            gammas[rows] -= self.stepsize / np.sqrt(acc_g[rows] + self.eps) * dg[keep]
+            betas[rows] -= self.stepsize / np.sqrt(acc_b[rows] + self.eps) * db[keep]
+            steps[rows] += 1
+            active = rows
+
+        final, _, _ = engine.objective_and_grad(gammas, betas)
+        winner = int(np.argmin(final))
+        return {
+            "params": [gammas[winner].tolist(), betas[winner].tolist()],
+            "objective": float(final[winner]),
+            "best_start": winner,
+            "all_params": np.stack([gammas, betas], axis=1),
+            "all_objectives": final,
+            "steps": steps,
+            "traces": traces
+        }
+
+def initial_starts(n_starts, num_layers, strategy="random", scale=0.01, seed=None):
+    # "random": the same 0.01 * rand init run_qaoa_for_graph uses, drawn from
+    # the global np.random like the rest of the repo (seed, if given, reseeds
+    # it), so start 0 is the single-start init;
+    # "linear": linear-ramp (annealing-like) schedules of increasing length
+    if strategy == "linear":
+        ramp = (np.arange(num_layers) + 0.5) / num_layers
+        dt = np.linspace(0.2, 1.0, n_starts)[:, None]
+        return dt * ramp, dt * (1 - ramp)
+    if seed is not None:
+        np.random.seed(seed)
+    init = scale * np.random.rand(n_starts, 2, num_layers)
+    return init[:, 0], init[:, 1]
+
+def optimize_multistart(graph, num_layers=1, n_starts=16, strategy="random", seed=None, **options):
+    # best parameters over n_starts, as [gammas, betas], plus per-start traces
+    engine = StatevectorQAOA(graph)
+    gammas, betas = initial_starts(n_starts, num_layers, strategy, seed=seed)
+    return MultiStartAdagrad(**options).run(engine, gammas, betas)
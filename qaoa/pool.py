@@ -0,0 +1,126 @@
+from collections import OrderedDict
+
+
+def canonical_edges(graph):
+    # ZZ terms are symmetric and commute, so orientation and order do not matter
+    return tuple(sorted(tuple(sorted(edge)) for edge in graph))
+
+
+class CircuitPool:
+    # bounded LRU cache of built circuits, keyed by
+    # (backend, canonical edge list, num_wires, num_layers)
+    def __init__(self, maxsize=32):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+
+    def key(self, backend, graph, num_wires, num_layers):
+        return (backend, canonical_edges(graph), num_wires, num_layers)
+
+    def get(self, key, factory):
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        self.misses += 1
+        value = factory()
+        self.entries[key] = value
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+        return value
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "maxsize": self.maxsize
+        }
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+
+# shared by QAOAMaxCut and run_qaoa_for_graph
+circuit_pool = CircuitPool()
+
+
+class PrefixStateCache:
+    # bounded LRU cache of intermediate statevectors: the key of depth k is
+    # (canonical edge list, num_wires, gamma_1..gamma_k, beta_1..beta_k), the
+    # value the two snapshots of layer k (after U_C and after U_B). Evicts the
+    # least recently used layers once the stored states exceed max_bytes
+    def __init__(self, max_bytes=256 * 2 ** 20):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.entries = OrderedDict()
+
+    def keys(self, graph, num_wires, gammas, betas):
+        # one key per depth 1..num_layers
+        base = (canonical_edges(graph), num_wires)
+        gammas, betas = tuple(map(float, gammas)), tuple(map(float, betas))
+        return [base + (gammas[:k], betas[:k]) for k in range(1, len(gammas) + 1)]
+
+    def lookup(self, keys):
+        # snapshots of the deepest cached prefix, as a list of layer pairs
+        layers = []
+        for key in keys:
+            if key not in self.entries:
+                break
+            layers.append(self.entries[key])
+        self.hits += len(layers)
+        self.misses += len(keys) - len(layers)
+        return layers
+
+    def touch(self, keys):
+        # mark a prefix as used, deepest first, so shallower layers are evicted
+        # last: a missing layer would hide every deeper one from lookup.
+        # Eviction waits until here, when that order is settled
+        for key in reversed(keys):
+            if key in self.entries:
+                self.entries.move_to_end(key)
+        self.evict()
+
+    def put(self, key, layer):
+        # layer: (state after U_C, state after U_B); shared, hence read-only
+        for state in layer:
+            state.setflags(write=False)
+        if key in self.entries:
+            self.nbytes -= sum(state.nbytes for state in self.entries.pop(key))
+        self.entries[key] = layer
+        self.nbytes += sum(state.nbytes for state in layer)
+
+    def evict(self):
+        while self.nbytes > self.max_bytes and self.entries:
+            _, evicted = self.entries.popitem(last=False)
+            self.nbytes -= sum(state.nbytes for state in evicted)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "nbytes": self.nbytes,
+            "max_bytes": self.max_bytes
+        }
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+
+# shared by every numpy-backend circuit that opts in
+prefix_cache = PrefixStateCache()
@@ -1,53 +1,83 @@
 import pennylane as qml
 import numpy as np
+from qaoa.statevector import StatevectorQAOA
+from qaoa.pool import circuit_pool, prefix_cache
+from qaoa.reducers import consume_snapshots
+from qaoa.trace import tracer
+
+def mixer_layer(beta, num_wires):
+    for wire in range(num_wires):
+        qml.RX(2 * beta, wires=wire)
+
+def cost_layer(gamma, graph):
+    for (i, j) in graph:
+        qml.CNOT(wires=(i, j))
+        qml.RZ(gamma, wires=j)
+        qml.CNOT(wires=(i, j))
+
+def build_qnode(graph, num_wires):
+    # depends only on the graph, so one device / QNode can serve every
+    # (gamma, beta) point of a sweep
+    dev = qml.device("default.qubit", wires=num_wires, shots=None)
+    # cost Hamiltonian built once, not on every call
+    C = qml.sum(*(qml.Z(i) @ qml.Z(j) for i, j in graph))
+
+    @qml.qnode(dev)
+    def circuit(gammas, betas, return_samples=False):
+        for w in range(num_wires):
+            qml.Hadamard(wires=w)
+
+        for gamma, beta in zip(gammas, betas):
+            cost_layer(gamma, graph)
+            qml.Snapshot()
+            mixer_layer(beta, num_wires)
+            qml.Snapshot()
+
+        if return_samples:
+            return qml.sample()
+
+        return qml.expval(C)
+
+    return dev, circuit
+
+def get_circuit(graph, num_wires, num_layers, backend="pennylane"):
+    # pooled (dev, circuit); dev is None on the numpy backend
+    key = circuit_pool.key(backend, graph, num_wires, num_layers)
+    if backend == "numpy":
+        return circuit_pool.get(key, lambda: (None, StatevectorQAOA(graph, num_wires)))
+    return circuit_pool.get(key, lambda: build_qnode(graph, num_wires))
 
 class QAOAMaxCut:
-    def __init__(self, graph, num_layers=1,  params=None, steps=20, seed=None):
+    def __init__(self, graph, num_layers=1,  params=None, steps=20, seed=None, backend="pennylane", reuse_prefix=False):
         self.graph = graph
         self.num_layers = num_layers
         self.steps = steps
         self.seed = seed
-        if seed is not None:
-            np.random.seed(seed)
         self.num_wires = max(max(edge) for edge in graph) + 1
-        self.dev = qml.device("default.qubit", wires=self.num_wires, shots=None)
+        self.backend = backend
         self.params = params
-        self.circuit = self._build_qnode()
+        # numpy backend: plain statevector simulation, no device / tape construction
+        with tracer.span("QAOAMaxCut.build", args={"backend": backend, "wires": self.num_wires}):
+            self.dev, self.circuit = get_circuit(graph, self.num_wires, num_layers, backend)
+        # seeded after the pool lookup: building a default.qubit device on a
+        # pool miss draws from the global RNG
+        if seed is not None:
+            np.random.seed(seed)
+        # numpy backend: resume reruns from the deepest cached parameter prefix;
+        # for scripted callers that edit the tail of per-layer schedules (runs
+        # with the same parameters on every layer share no prefix)
+        self.cache = prefix_cache if reuse_prefix and backend == "numpy" else None
 
     def U_B(self, beta):
-        for wire in range(self.num_wires):
-            qml.RX(2 * beta, wires=wire)
+        mixer_layer(beta, self.num_wires)
 
     def U_C(self, gamma):
-        for (i, j) in self.graph:
-            qml.CNOT(wires=(i, j))
-            qml.RZ(gamma, wires=j)
-            qml.CNOT(wires=(i, j))
+        cost_layer(gamma, self.graph)
 
     def objective(self, params):
         gammas, betas = params
         return -0.5 * (len(self.graph) - self.circuit(gammas, betas))
 
-    def _build_qnode(self):
-        @qml.qnode(self.dev)
-        def circuit(gammas, betas, return_samples=False):
-            for w in range(self.num_wires):
-                qml.Hadamard(wires=w)
-
-            for gamma, beta in zip(gammas, betas):
-                self.U_C(gamma)
-                qml.Snapshot()
-                self.U_B(beta)
-                qml.Snapshot()
-
-            if return_samples:
-                return qml.sample()
-
-            C = qml.sum(*(qml.Z(i) @ qml.Z(j) for i, j in self.graph))
-            return qml.expval(C)
-
-        return circuit
-
     def run(self):
         # if self.params is None:
         #     init = 0.01 * np.random.rand(2, self.num_layers)
@@ -56,7 +86,38 @@ class QAOAMaxCut:
         #     opt = qml.AdagradOptimizer(stepsize=0.5)
         #     for _ in range(self.steps):
         #         self.params = opt.step(self.objective, self.params)
-        snaps = qml.snapshots(self.circuit)(*self.params)
-        return snaps
+        with tracer.span("QAOAMaxCut.run", runs=1, amplitudes=2 * self.num_layers * 2 ** self.num_wires):
+            if self.backend == "numpy":
+                return self.circuit.snapshots(*self.params, cache=self.cache)
+            snaps = qml.snapshots(self.circuit)(*self.params)
+            return snaps
+
+    def iter_snapshots(self, gammas=None, betas=None):
+        # yields (snapshot id, state); the numpy backend produces each state
+        # lazily and also accepts (n_runs, num_layers) parameters
+        if gammas is None:
+            gammas, betas = self.params
+        if self.backend == "numpy":
+            yield from self.circuit.iter_snapshots(gammas, betas)
+            return
+        snaps = qml.snapshots(self.circuit)(gammas, betas)
+        for i in range(len(snaps) - 1):
+            yield i, snaps[i]
+
+    def stream(self, reducers, gammas=None, betas=None):
+        # feeds every snapshot to the reducers and returns only their results
+        return consume_snapshots(self.iter_snapshots(gammas, betas), reducers)
+
+    def run_batch(self, gammas, betas):
+        # gammas, betas: (n_runs, num_layers) -> (n_runs, n_snapshots, 2**num_wires)
+        n_runs = len(gammas)
+        with tracer.span("QAOAMaxCut.run_batch", runs=n_runs, amplitudes=n_runs * 2 * self.num_layers * 2 ** self.num_wires):
+            if self.backend == "numpy":
+                return self.circuit.snapshots_batch(gammas, betas, cache=self.cache)
+            runs = []
+            for g, b in zip(gammas, betas):
+                snaps = qml.snapshots(self.circuit)(g, b)
+                runs.append([snaps[i] for i in range(len(snaps) - 1)])
+            return np.array(runs)
 
 
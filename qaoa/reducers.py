@@ -0,0 +1,130 @@
+import numpy as np
+from qaoa.data_processor import state_indices
+from qaoa.metrics import CutMetrics
+
+# Reducers consume snapshots one at a time (see StatevectorQAOA.iter_snapshots)
+# and keep only their reduction, never the statevectors themselves.
+# A single-run state gives results of shape (n_snapshots, ...), a
+# (n_runs, 2^num_wires) stack gives (n_runs, n_snapshots, ...).
+
+class SnapshotReducer:
+    def __init__(self):
+        self.values = []
+        self.batched = False
+
+    def reduce(self, state):
+        raise NotImplementedError
+
+    def reset(self):
+        self.values = []
+
+    def consume(self, index, state):
+        self.batched = state.ndim == 2
+        self.values.append(self.reduce(state))
+
+    def stack(self, values):
+        return np.stack(values, axis=1 if self.batched else 0)
+
+    def result(self):
+        return self.stack(self.values)
+
+
+class ProbabilityReducer(SnapshotReducer):
+    # probabilities of every basis state, only of the given bitstrings, or
+    # only of the orbit representatives of a StateSymmetry
+    def __init__(self, states=None, num_wires=None, dtype=np.float64, symmetry=None):
+        super().__init__()
+        self.idx = None if states is None else state_indices(states, num_wires)
+        if symmetry is not None and states is None:
+            self.idx = symmetry.representatives
+        self.dtype = dtype
+
+    def reduce(self, state):
+        if self.idx is not None:
+            state = state[..., self.idx]
+        return (np.abs(state) ** 2).astype(self.dtype, copy=False)
+
+
+class PhaseReducer(ProbabilityReducer):
+    def reduce(self, state):
+        if self.idx is not None:
+            state = state[..., self.idx]
+        return np.angle(state).astype(self.dtype, copy=False)
+
+
+class TopKReducer(SnapshotReducer):
+    # indices and probabilities of the k most probable states, most probable first
+    def __init__(self, k):
+        super().__init__()
+        self.k = k
+
+    def reduce(self, state):
+        probs = np.abs(state) ** 2
+        k = min(self.k, probs.shape[-1])
+        idx = np.argpartition(probs, -k, axis=-1)[..., -k:]
+        top = np.take_along_axis(probs, idx, axis=-1)
+        order = np.argsort(-top, axis=-1)
+        return np.take_along_axis(idx, order, axis=-1), np.take_along_axis(top, order, axis=-1)
+
+    def result(self):
+        return (self.stack([idx for idx, _ in self.values]),
+                self.stack([top for _, top in self.values]))
+
+
+class EdgeCorrelatorReducer(SnapshotReducer):
+    # <Z_i Z_j> for every edge of the graph, from the 2-wire marginal of the
+    # edge: one float reduction of the probabilities per edge, nothing built
+    # over the 2^num_wires basis (per-edge sign vectors would take |E| times
+    # the state's memory)
+    def __init__(self, graph, num_wires):
+        super().__init__()
+        self.graph = graph
+        self.num_wires = num_wires
+        # per edge: (..., 2^a, 2, 2^(b-a-1), 2, 2^(n-b-1)) view of the
+        # probabilities, wire a < b (wire 0 is the most significant bit)
+        self.shapes = []
+        for edge in graph:
+            a, b = sorted(edge)
+            self.shapes.append((2 ** a, 2, 2 ** (b - a - 1), 2, 2 ** (num_wires - 1 - b)))
+        self.signs = np.array([[1.0, -1.0], [-1.0, 1.0]])
+
+    def reduce(self, state):
+        probs = np.abs(state) ** 2
+        batch = probs.shape[:-1]
+        values = []
+        for shape in self.shapes:
+            marginal = probs.reshape(batch + shape).sum(axis=(-5, -3, -1))
+            values.append(np.sum(marginal * self.signs, axis=(-2, -1)))
+        return np.stack(values, axis=-1)
+
+
+class CutMetricsReducer(SnapshotReducer):
+    # <C>, approximation ratio, P(optimal cut) and cut distribution per snapshot
+    def __init__(self, graph, num_wires):
+        super().__init__()
+        self.metrics = CutMetrics(graph, num_wires)
+
+    def reduce(self, state):
+        return self.metrics.all(np.abs(state) ** 2)
+
+    def result(self):
+        return {name: self.stack([values[name] for values in self.values]) for name in self.values[0]}
+
+
+def consume_snapshots(snapshots, reducers):
+    # snapshots: iterable of (snapshot id, state); returns one result per reducer
+    for index, state in snapshots:
+        for reducer in reducers:
+            reducer.consume(index, state)
+    return [reducer.result() for reducer in reducers]
+
+
+def concat_runs(parts):
+    # results of consecutive run chunks -> one result, joined along the run
+    # axis (arrays, tuples of arrays like TopKReducer, dicts like CutMetricsReducer)
+    first = parts[0]
+    if isinstance(first, dict):
+        return {name: concat_runs([part[name] for part in parts]) for name in first}
+    if isinstance(first, tuple):
+        return tuple(concat_runs(list(values)) for values in zip(*parts))
+    return np.concatenate(parts, axis=0)
@@ -0,0 +1,149 @@
+import functools
+import hashlib
+import os
+import types
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from qaoa.trace import tracer
+
+# Figures are rendered as jobs: func(file_path, *args, **kwargs) saving to
+# file_path. A job whose inputs hash to the value recorded next to its
+# outputs (<file>.hash) is skipped, the rest go to a pool of Agg workers.
+# The inputs include the code of func and of the same-module helpers it calls,
+# so editing a plot function re-renders its figures; RENDER_VERSION covers
+# changes outside that code (matplotlib style, library upgrades).
+
+RENDER_VERSION = 1
+
+def use_agg():
+    # worker initializer: no GUI backend, no display needed
+    import matplotlib
+    matplotlib.use("Agg")
+
+def update_hash(h, value):
+    # stable digest of nested dicts / lists / arrays / scalars; anything else
+    # is rejected, since its repr may change between processes (addresses)
+    if isinstance(value, dict):
+        h.update(b"dict")
+        for key in sorted(value, key=repr):
+            update_hash(h, key)
+            update_hash(h, value[key])
+    elif isinstance(value, (list, tuple)):
+        # numeric lists (probability / phase rows) are hashed as one buffer
+        if value and all(isinstance(item, (int, float, np.number)) for item in value):
+            update_hash(h, np.asarray(value))
+            return
+        h.update(f"seq{len(value)}".encode())
+        for item in value:
+            update_hash(h, item)
+    elif isinstance(value, np.ndarray):
+        h.update(f"nd{value.dtype.str}{value.shape}".encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif value is None or isinstance(value, (str, bytes, bool, int, float, complex, np.generic)):
+        h.update(f"{type(value).__name__}:{value!r}".encode())
+    else:
+        raise TypeError(f"cannot hash render input of type {type(value).__name__}: pass plain data")
+
+def update_code_hash(h, code):
+    h.update(code.co_code)
+    h.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            update_code_hash(h, const)
+        elif isinstance(const, frozenset):
+            # set literals: element order follows the per-process string hash
+            h.update(repr(sorted(const, key=repr)).encode())
+        else:
+            h.update(repr(const).encode())
+
+def code_names(code):
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= code_names(const)
+    return names
+
+@functools.lru_cache(maxsize=None)
+def code_hash(func):
+    # func plus every function of its module it reaches by global name
+    # (prepare_fig, plot_state_series, ...), in a stable order
+    functions, pending = {}, [func]
+    while pending:
+        f = pending.pop()
+        if f.__qualname__ in functions:
+            continue
+        functions[f.__qualname__] = f
+        for name in code_names(f.__code__):
+            g = f.__globals__.get(name)
+            if isinstance(g, types.FunctionType) and g.__globals__ is func.__globals__:
+                pending.append(g)
+    h = hashlib.sha256(f"render{RENDER_VERSION}".encode())
+    for name in sorted(functions):
+        h.update(name.encode())
+        update_code_hash(h, functions[name].__code__)
+    return h.hexdigest()
+
+def input_hash(func, args, kwargs):
+    h = hashlib.sha256(f"{func.__module__}.{func.__qualname__}".encode())
+    h.update(code_hash(func).encode())
+    update_hash(h, list(args))
+    update_hash(h, kwargs)
+    return h.hexdigest()
+
+def hash_path(file_path):
+    return file_path + ".hash"
+
+def is_current(outputs, digest):
+    # every output exists and was produced from the same inputs
+    if not all(os.path.exists(path) for path in outputs):
+        return False
+    try:
+        with open(hash_path(outputs[0])) as f:
+            return f.read().strip() == digest
+    except FileNotFoundError:
+        return False
+
+def render_job(func, file_path, args, kwargs):
+    # traced in the parent only (serial rendering); the whole pool is one
+    # "RenderStage.run" span there
+    with tracer.span(f"render.{func.__name__}") as span:
+        func(file_path, *args, **kwargs)
+        span.add("bytes", os.path.getsize(file_path))
+    return file_path
+
+class RenderStage:
+    def __init__(self, workers=1):
+        self.workers = workers
+        self.jobs = []
+
+    def submit(self, func, file_path, *args, outputs=None, **kwargs):
+        # outputs: every file the job writes, file_path first (defaults to
+        # file_path alone); all must exist for the job to be skipped
+        self.jobs.append((func, file_path, args, kwargs, outputs or [file_path]))
+
+    def run(self):
+        # returns {"rendered": n, "skipped": n}
+        pending = []
+        with tracer.span("RenderStage.hash"):
+            for func, file_path, args, kwargs, outputs in self.jobs:
+                digest = input_hash(func, args, kwargs)
+                if not is_current(outputs, digest):
+                    pending.append((func, file_path, args, kwargs, outputs, digest))
+        skipped = len(self.jobs) - len(pending)
+        self.jobs = []
+
+        with tracer.span("RenderStage.run", rendered=len(pending), skipped=skipped):
+            if self.workers > 1 and len(pending) > 1:
+                with ProcessPoolExecutor(max_workers=min(self.workers, len(pending)), initializer=use_agg) as pool:
+                    futures = [pool.submit(render_job, func, file_path, args, kwargs)
+                               for func, file_path, args, kwargs, _, _ in pending]
+                    for future in futures:
+                        future.result()
+            else:
+                for func, file_path, args, kwargs, _, _ in pending:
+                    render_job(func, file_path, args, kwargs)
+
+        for _, _, _, _, outputs, digest in pending:
+            with open(hash_path(outputs[0]), "w") as f:
+                f.write(digest)
+        return {"rendered": len(pending), "skipped": skipped}
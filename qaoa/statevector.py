@@ -0,0 +1,220 @@
+import numpy as np
+from qaoa.metrics import cut_values
+
+# runs are evolved in chunks of about this many amplitudes so that the
+# working set stays cache-sized on large batches
+BATCH_AMPLITUDES = 2 ** 16
+
+
+def zz_diagonal(graph, num_wires):
+    # sum over the edges of Z_i Z_j, evaluated on every computational basis state
+    # (wire 0 is the most significant bit, same ordering as default.qubit)
+    # each cut edge contributes -1, every other edge +1
+    return len(graph) - 2.0 * cut_values(graph, num_wires)
+
+
+def repeat_layers(values, num_layers):
+    # one value per run -> (n_runs, num_layers), same value on every layer
+    values = np.asarray(values, dtype=float)
+    return np.repeat(values[:, None], num_layers, axis=1)
+
+
+# gamma / beta are scalars for a single state, or one value per row when
+# state is a (n_runs, 2**num_wires) stack
+
+def apply_cost(state, gamma, diag):
+    # CNOT-RZ(gamma)-CNOT on an edge is exp(-i gamma/2 Z_i Z_j), so the whole
+    # cost layer is a single diagonal phase (global phase included)
+    gamma = np.asarray(gamma)[..., None]
+    return state * np.exp(-0.5j * gamma * diag)
+
+
+def apply_mixer(state, beta, num_wires):
+    # RX(2 beta) on every wire: |b> -> cos(beta)|b> - i sin(beta)|not b>
+    beta = np.asarray(beta)[..., None, None, None]
+    c, s = np.cos(beta), -1j * np.sin(beta)
+    batch = state.shape[:-1]
+    for wire in range(num_wires):
+        view = state.reshape(*batch, 2 ** wire, 2, -1)
+        state = (c * view + s * view[..., ::-1, :]).reshape(*batch, -1)
+    return state
+
+
+def apply_x_sum(state, num_wires):
+    # (sum_k X_k) state, the generator of the mixer layer
+    batch = state.shape[:-1]
+    out = np.zeros_like(state)
+    for wire in range(num_wires):
+        view = state.reshape(*batch, 2 ** wire, 2, -1)
+        out += view[..., ::-1, :].reshape(*batch, -1)
+    return out
+
+
+class StatevectorQAOA:
+    def __init__(self, graph, num_wires=None):
+        self.graph = graph
+        if num_wires is None:
+            num_wires = max(max(edge) for edge in graph) + 1
+        self.num_wires = num_wires
+        self.diag = zz_diagonal(graph, num_wires)
+
+    def initial_state(self):
+        dim = 2 ** self.num_wires
+        return np.full(dim, 1 / np.sqrt(dim), dtype=complex)
+
+    def expval(self, state):
+        if state.ndim == 1:
+            return float(np.dot(np.abs(state) ** 2, self.diag))
+        return (np.abs(state) ** 2) @ self.diag
+
+    def evolve(self, gammas, betas):
+        state = self.initial_state()
+        for index, state in self.iter_snapshots(gammas, betas):
+            pass
+        return state
+
+    def __call__(self, gammas, betas):
+        # same return value as the QNode: <sum Z_i Z_j>
+        return self.expval(self.evolve(gammas, betas))
+
+    def objective_and_grad(self, gammas, betas):
+        # objective -0.5 * (n_edges - <sum ZZ>) and its gradient w.r.t. every
+        # gamma and beta by adjoint differentiation: one forward sweep, then one
+        # backward sweep that un-applies each layer to both the state and
+        # lambda = D psi. Works on (num_layers,) or (n_runs, num_layers) params
+        gammas = np.asarray(gammas, dtype=float)
+        betas = np.asarray(betas, dtype=float)
+        state = self.evolve(gammas, betas)
+        lam = state * self.diag
+        expval = np.sum(state.conj() * lam, axis=-1).real
+        dgammas, dbetas = np.empty_like(gammas), np.empty_like(betas)
+        for layer in reversed(range(gammas.shape[-1])):
+            gamma, beta = gammas[..., layer], betas[..., layer]
+            # d<D>/dtheta = 2 Im <lambda|G|psi> for a gate exp(-i theta G)
+            dbetas[..., layer] = 2 * np.sum(lam.conj() * apply_x_sum(state, self.num_wires), axis=-1).imag
+            state = apply_mixer(state, -beta, self.num_wires)
+            lam = apply_mixer(lam, -beta, self.num_wires)
+            dgammas[..., layer] = np.sum(lam.conj() * (state * self.diag), axis=-1).imag
+            state = apply_cost(state, -gamma, self.diag)
+            lam = apply_cost(lam, -gamma, self.diag)
+        objective = -0.5 * (len(self.graph) - expval)
+        return objective, 0.5 * dgammas, 0.5 * dbetas
+
+    def objective_grad(self, params):
+        # grad_fn for qml optimizers: params is the (2, num_layers) [gammas, betas]
+        _, dgammas, dbetas = self.objective_and_grad(params[0], params[1])
+        return np.array([dgammas, dbetas])
+
+    def iter_snapshots(self, gammas, betas):
+        # yields (snapshot id, state) as soon as each U_C / U_B is applied, so
+        # consumers can reduce it and let it go; with (n_runs, num_layers)
+        # parameters the state is the (n_runs, 2**num_wires) stack
+        gammas = np.asarray(gammas, dtype=float)
+        betas = np.asarray(betas, dtype=float)
+        state = self.initial_state()
+        if gammas.ndim == 2:
+            state = np.broadcast_to(state, (len(gammas), state.size))
+        for layer in range(gammas.shape[-1]):
+            state = apply_cost(state, gammas[..., layer], self.diag)
+            yield 2 * layer, state
+            state = apply_mixer(state, betas[..., layer], self.num_wires)
+            yield 2 * layer + 1, state
+
+    def resume_snapshots(self, gammas, betas, cache):
+        # (snapshot id, state) pairs like iter_snapshots, but layers whose
+        # parameter prefix is in the PrefixStateCache are reused and only the
+        # changed tail is simulated
+        keys = cache.keys(self.graph, self.num_wires, gammas, betas)
+        layers = cache.lookup(keys)
+        state = layers[-1][1] if layers else self.initial_state()
+        for layer in range(len(layers), len(keys)):
+            cost = apply_cost(state, gammas[layer], self.diag)
+            state = apply_mixer(cost, betas[layer], self.num_wires)
+            cache.put(keys[layer], (cost, state))
+            layers.append((cost, state))
+        cache.touch(keys)
+        return [(2 * layer + half, pair[half]) for layer, pair in enumerate(layers) for half in (0, 1)]
+
+    def snapshots(self, gammas, betas, cache=None):
+        # mirrors qml.snapshots: one state after every U_C and U_B, plus the
+        # final expectation value under "execution_results"
+        if cache is not None:
+            snaps = dict(self.resume_snapshots(gammas, betas, cache))
+        else:
+            snaps = dict(self.iter_snapshots(gammas, betas))
+        final = snaps[len(snaps) - 1] if snaps else self.initial_state()
+        snaps["execution_results"] = self.expval(final)
+        return snaps
+
+    def snapshots_batch(self, gammas, betas, cache=None):
+        # gammas, betas: (n_runs, num_layers), all runs evolved as one stack
+        # returns (n_runs, n_snapshots, 2**num_wires); with a PrefixStateCache
+        # each run instead resumes from its deepest cached prefix
+        gammas = np.asarray(gammas, dtype=float)
+        betas = np.asarray(betas, dtype=float)
+        n_runs, num_layers = gammas.shape
+        dim = 2 ** self.num_wires
+        snaps = np.empty((n_runs, 2 * num_layers, dim), dtype=complex)
+        if cache is not None:
+            for run, (g, b) in enumerate(zip(gammas, betas)):
+                for index, state in self.resume_snapshots(g, b, cache):
+                    snaps[run, index] = state
+            return snaps
+        chunk = max(1, BATCH_AMPLITUDES // dim)
+        for start in range(0, n_runs, chunk):
+            rows = slice(start, start + chunk)
+            for index, state in self.iter_snapshots(gammas[rows], betas[rows]):
+                snaps[rows, index] = state
+        return snaps
+
+    def expval_batch(self, gammas, betas):
+        # <sum Z_i Z_j> for every row of (n_runs, num_layers) parameters,
+        # without keeping any snapshot
+        gammas = np.asarray(gammas, dtype=float)
+        betas = np.asarray(betas, dtype=float)
+        chunk = max(1, BATCH_AMPLITUDES // 2 ** self.num_wires)
+        values = np.empty(len(gammas))
+        for start in range(0, len(gammas), chunk):
+            rows = slice(start, start + chunk)
+            state = np.broadcast_to(self.initial_state(), (len(gammas[rows]), 2 ** self.num_wires))
+            for gamma, beta in zip(gammas[rows].T, betas[rows].T):
+                state = apply_cost(state, gamma, self.diag)
+                state = apply_mixer(state, beta, self.num_wires)
+            values[rows] = self.expval(state)
+        return values
+
+    def edge_correlators(self, state):
+        # <Z_i Z_j>, <Z_i Y_j> + <Y_i Z_j> and <Y_i Y_j> summed over the edges,
+        # one value per row of a (n_runs, 2**num_wires) stack
+        idx = np.arange(2 ** self.num_wires)
+        zz = zy = yy = 0
+        for (i, j) in self.graph:
+            mi, mj = 1 << (self.num_wires - 1 - i), 1 << (self.num_wires - 1 - j)
+            zi, zj = 1 - 2 * ((idx & mi) > 0), 1 - 2 * ((idx & mj) > 0)
+            # (Y_k psi)(x) = -i z_k(x) psi(x ^ m_k)
+            yi = -1j * zi * state[..., idx ^ mi]
+            yj = -1j * zj * state[..., idx ^ mj]
+            yiyj = -1j * zj * yi[..., idx ^ mj]
+            conj = state.conj()
+            zz = zz + (np.abs(state) ** 2) @ (zi * zj)
+            zy = zy + np.sum(conj * (zi * yj + zj * yi), axis=-1).real
+            yy = yy + np.sum(conj * yiyj, axis=-1).real
+        return zz, zy, yy
+
+    def landscape(self, gamma_vals, beta_vals, num_layers=1):
+        # <sum Z_i Z_j> on the full gamma x beta grid (same angles on every
+        # layer), shape (len(gamma_vals), len(beta_vals))
+        if num_layers == 1:
+            # only U_C depends on gamma, so evolve one state per gamma and apply
+            # the mixer in the Heisenberg picture: Z -> cos(2b) Z + sin(2b) Y
+            gamma_vals = np.asarray(gamma_vals, dtype=float)
+            state = np.broadcast_to(self.initial_state(), (len(gamma_vals), 2 ** self.num_wires))
+            zz, zy, yy = self.edge_correlators(apply_cost(state, gamma_vals, self.diag))
+            c, s = np.cos(2 * np.asarray(beta_vals)), np.sin(2 * np.asarray(beta_vals))
+            return np.outer(zz, c ** 2) + np.outer(zy, c * s) + np.outer(yy, s ** 2)
+        g, b = np.meshgrid(gamma_vals, beta_vals, indexing="ij")
+        values = self.expval_batch(
+            repeat_layers(g.ravel(), num_layers),
+            repeat_layers(b.ravel(), num_layers)
+        )
+        return values.reshape(g.shape)
@@ -0,0 +1,125 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from qaoa.qaoa import get_circuit
+from qaoa.statevector import repeat_layers, BATCH_AMPLITUDES
+from qaoa.symmetry import StateSymmetry
+from qaoa.reducers import ProbabilityReducer, PhaseReducer, CutMetricsReducer, consume_snapshots, concat_runs
+
+def stream_sweep(edges, num_layers, gamma_vals, beta_vals, reducers):
+    # numpy backend: runs evolved in stacks of at most BATCH_AMPLITUDES
+    # amplitudes (one run at a time past 16 qubits, as in snapshots_batch),
+    # each snapshot reduced as it is produced; only the reductions are kept,
+    # joined as (n_runs, n_snapshots, ...)
+    num_wires = max(max(edge) for edge in edges) + 1
+    dev, engine = get_circuit(edges, num_wires, num_layers, "numpy")
+    gammas = repeat_layers(gamma_vals, num_layers)
+    betas = repeat_layers(beta_vals, num_layers)
+    chunk = max(1, BATCH_AMPLITUDES // 2 ** num_wires)
+    parts = []
+    for start in range(0, len(gammas), chunk):
+        rows = slice(start, start + chunk)
+        for reducer in reducers:
+            reducer.reset()
+        parts.append(consume_snapshots(engine.iter_snapshots(gammas[rows], betas[rows]), reducers))
+    return [concat_runs([part[i] for part in parts]) for i in range(len(reducers))]
+
+def sweep_shape(edges, num_layers, n_runs, states, num_wires, symmetry):
+    # (n_runs, n_snapshots, n_values) of the probability / phase arrays
+    n_values = 2 ** num_wires if states is None else len(states)
+    if symmetry and states is None:
+        n_values = len(StateSymmetry.for_graph(edges, num_wires))
+    return (n_runs, 2 * num_layers, n_values)
+
+def sweep_reducers(edges, states, num_wires, symmetry):
+    # probability / phase reducers; symmetry=True keeps orbit representatives only
+    symmetry = StateSymmetry.for_graph(edges, num_wires) if symmetry else None
+    return [ProbabilityReducer(states, num_wires, symmetry=symmetry),
+            PhaseReducer(states, num_wires, symmetry=symmetry)]
+
+def run_shard(edges, num_layers, gamma_vals, beta_vals, states, num_wires, start, shm_name, shape, symmetry=False):
+    # worker side: simulate runs [start, start + len(gamma_vals)) and write
+    # their probabilities / phases straight into the parent's shared block
+    probs, phases = stream_sweep(edges, num_layers, gamma_vals, beta_vals,
+                                 sweep_reducers(edges, states, num_wires, symmetry))
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        out[0, start:start + len(probs)] = probs
+        out[1, start:start + len(phases)] = phases
+        del out
+    finally:
+        shm.close()
+    return start
+
+class SweepExecutor:
+    # shards (gamma, beta) points across worker processes; every shard writes
+    # into its own slice of one shared-memory block, so the merged result is in
+    # run order regardless of which worker finishes first
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def shutdown(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def run(self, edges, num_layers, gamma_vals, beta_vals, states=None, num_wires=None, symmetry=False):
+        # returns probs, phases as (n_runs, n_snapshots, n_values) arrays, with
+        # n_values = 2^num_wires, len(states) when states are given, or the
+        # number of orbits with symmetry=True
+        gamma_vals = np.asarray(gamma_vals, dtype=float)
+        beta_vals = np.asarray(beta_vals, dtype=float)
+        if num_wires is None:
+            num_wires = max(max(edge) for edge in edges) + 1
+        shape = (2,) + sweep_shape(edges, num_layers, len(gamma_vals), states, num_wires, symmetry)
+        if len(gamma_vals) == 0:
+            # nothing to shard: empty (0, n_snapshots, n_values) arrays
+            values = np.zeros(shape)
+            return values[0], values[1]
+
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+        try:
+            shards = np.array_split(np.arange(len(gamma_vals)), min(self.max_workers, len(gamma_vals)))
+            futures = [
+                self.pool.submit(run_shard, edges, num_layers, gamma_vals[shard], beta_vals[shard],
+                                 states, num_wires, int(shard[0]), shm.name, shape, symmetry)
+                for shard in shards if len(shard)
+            ]
+            for future in futures:
+                future.result()
+            values = np.ndarray(shape, dtype=np.float64, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+        return values[0], values[1]
+
+def sweep_values(edges, num_layers, gamma_vals, beta_vals, states=None, num_wires=None, workers=1, symmetry=False):
+    # probabilities / phases of a whole sweep, (n_runs, n_snapshots, n_values)
+    if workers > 1:
+        with SweepExecutor(workers) as executor:
+            return executor.run(edges, num_layers, gamma_vals, beta_vals, states, num_wires, symmetry)
+    if num_wires is None:
+        num_wires = max(max(edge) for edge in edges) + 1
+    if len(gamma_vals) == 0:
+        shape = sweep_shape(edges, num_layers, 0, states, num_wires, symmetry)
+        return np.zeros(shape), np.zeros(shape)
+    return stream_sweep(edges, num_layers, gamma_vals, beta_vals,
+                        sweep_reducers(edges, states, num_wires, symmetry))
+
+def sweep_cut_metrics(edges, num_layers, gamma_vals, beta_vals, num_wires=None):
+    # { metric: (n_runs, n_snapshots, ...) } for every snapshot of every run,
+    # from probabilities only, without a Hamiltonian expval per snapshot
+    if num_wires is None:
+        num_wires = max(max(edge) for edge in edges) + 1
+    return stream_sweep(edges, num_layers, gamma_vals, beta_vals, [CutMetricsReducer(edges, num_wires)])[0]
@@ -0,0 +1,128 @@
+from functools import lru_cache
+import numpy as np
+from qaoa.pool import canonical_edges
+
+# QAOA for MaxCut from |+>^n commutes with the global bit flip X^n and with
+# every wire permutation that maps the edge set onto itself, so every
+# bitstring in an orbit of these symmetries has exactly the same amplitude.
+# Only one representative per orbit needs to be computed, stored or sent;
+# full vectors are rebuilt with a single gather.
+
+def graph_automorphisms(graph, num_wires, limit=256):
+    # wire permutations (perm[w] = image of w) preserving the edge set, found
+    # by backtracking; at most `limit` of them, identity included
+    adj = [set() for _ in range(num_wires)]
+    for (u, v) in graph:
+        if u != v:
+            adj[u].add(v)
+            adj[v].add(u)
+    # assign wires in BFS order so each choice is checked against neighbours early
+    order, seen = [], set()
+    for root in sorted(range(num_wires), key=lambda w: -len(adj[w])):
+        queue = [root] if root not in seen else []
+        seen.add(root)
+        while queue:
+            w = queue.pop(0)
+            order.append(w)
+            for n in sorted(adj[w] - seen):
+                seen.add(n)
+                queue.append(n)
+
+    found, perm, used = [], [None] * num_wires, [False] * num_wires
+
+    def extend(k):
+        if len(found) >= limit:
+            return
+        if k == len(order):
+            found.append(tuple(perm))
+            return
+        u = order[k]
+        for v in range(num_wires):
+            if used[v] or len(adj[v]) != len(adj[u]):
+                continue
+            if any((w in adj[u]) != (perm[w] in adj[v]) for w in order[:k]):
+                continue
+            perm[u], used[v] = v, True
+            extend(k + 1)
+            perm[u], used[v] = None, False
+
+    extend(0)
+    return found, len(found) >= limit
+
+def permute_indices(perm, num_wires):
+    # basis index -> index of the permuted bitstring (bit of wire w moves to
+    # wire perm[w]; wire 0 is the most significant bit)
+    # the image of an index is the OR of the images of its low and high bit
+    # halves: two small lookup tables and two gathers instead of a pass per bit
+    low = num_wires // 2
+    tables = []
+    for shift, width in ((0, low), (low, num_wires - low)):
+        part = np.arange(2 ** width, dtype=np.int64)
+        table = np.zeros_like(part)
+        for b in range(width):
+            w = num_wires - 1 - (shift + b)
+            table |= ((part >> b) & 1) << (num_wires - 1 - perm[w])
+        tables.append(table)
+    idx = np.arange(2 ** num_wires, dtype=np.int64)
+    return tables[0][idx & (2 ** low - 1)] | tables[1][idx >> low]
+
+class StateSymmetry:
+    # orbits of the basis states under graph automorphisms and / or the Z2 flip
+    def __init__(self, graph, num_wires=None, complement=True, automorphisms=True, limit=256):
+        if num_wires is None:
+            num_wires = max(max(edge) for edge in graph) + 1
+        self.num_wires = num_wires
+        dim = 2 ** num_wires
+        idx = np.arange(dim, dtype=np.int64)
+
+        perms, truncated = graph_automorphisms(graph, num_wires, limit) if automorphisms else ([], False)
+        self.automorphisms = [p for p in perms if p != tuple(range(num_wires))]
+        maps = [permute_indices(p, num_wires) for p in self.automorphisms]
+        if complement:
+            # last, so one pass over a complete automorphism group is exact
+            maps.append(idx ^ (dim - 1))
+
+        # label every state with the smallest index in its orbit; a truncated
+        # automorphism list is not closed, so iterate to a fixed point then
+        labels = idx.copy()
+        while True:
+            previous = labels
+            for image in maps:
+                labels = np.minimum(labels, labels[image])
+                if truncated:
+                    labels[image] = np.minimum(labels[image], labels)
+            if not truncated or np.array_equal(labels, previous):
+                break
+
+        # representatives: smallest index of each orbit, ascending
+        self.representatives = np.unique(labels)
+        # orbit[i]: position of state i's representative
+        self.orbit = np.searchsorted(self.representatives, labels)
+        self.sizes = np.bincount(self.orbit)
+
+    @classmethod
+    def for_graph(cls, graph, num_wires=None):
+        # cached per canonical graph
+        if num_wires is None:
+            num_wires = max(max(edge) for edge in graph) + 1
+        return _symmetry(canonical_edges(graph), num_wires)
+
+    def __len__(self):
+        return len(self.representatives)
+
+    @property
+    def ratio(self):
+        # stored / full size
+        return len(self.representatives) / 2 ** self.num_wires
+
+    def reduce(self, values):
+        # (..., 2^num_wires) -> (..., n_orbits)
+        return np.asarray(values)[..., self.representatives]
+
+    def expand(self, values):
+        # (..., n_orbits) -> (..., 2^num_wires)
+        return np.asarray(values)[..., self.orbit]
+
+@lru_cache(maxsize=32)
+def _symmetry(edges, num_wires):
+    return StateSymmetry(edges, num_wires)
@@ -0,0 +1,181 @@
+import atexit
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+# Opt-in timing spans for the pipeline stages. Off by default, where a span
+# costs one attribute check; enabled with QAOA_TRACE=<path> (or =1 for
+# qaoa_trace.json), --trace on the entry points, or tracer.enable(). On exit
+# the spans are written as Chrome trace JSON (chrome://tracing, Perfetto) and
+# a per-stage summary is printed to stderr.
+#
+#   with tracer.span("QAOAMaxCut.run", args={"backend": backend}, runs=1) as span:
+#       ...
+#       span.add("amplitudes", state.size)
+#
+# args label the span in the trace; keyword counters and add() are summed
+# per stage in the summary.
+#
+# Spans of pool worker processes are not collected: the parent's span around
+# the pool covers them.
+
+TRACE_ENV = "QAOA_TRACE"
+DEFAULT_TRACE_PATH = "qaoa_trace.json"
+
+class NullSpan:
+    # what span() returns while tracing is off
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, counter, value=1):
+        pass
+
+NULL_SPAN = NullSpan()
+
+class Span:
+    def __init__(self, tracer, name, args, counters):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.counters = counters
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.tracer.record(self.name, self.start, end, self.args, self.counters)
+        return False
+
+    def add(self, counter, value=1):
+        # per-stage counter (runs, amplitudes, bytes, ...), summed per span
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.events = []
+        self.origin = time.perf_counter_ns()
+        self.lock = threading.Lock()
+        self.registered = False
+
+    def enable(self, path=DEFAULT_TRACE_PATH):
+        # path: Chrome trace written at exit (None: export manually)
+        self.enabled = True
+        self.path = path
+        if path is not None and not self.registered:
+            atexit.register(self.finish)
+            self.registered = True
+
+    def disable(self):
+        self.enabled = False
+
+    def clear(self):
+        with self.lock:
+            self.events = []
+
+    def span(self, name, args=None, **counters):
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, dict(args or {}), counters)
+
+    def record(self, name, start, end, args, counters):
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": (start - self.origin) / 1000,
+            "dur": (end - start) / 1000,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": {**args, **counters},
+            "counters": counters
+        }
+        with self.lock:
+            self.events.append(event)
+
+    def chrome_trace(self):
+        with self.lock:
+            events = [{key: value for key, value in event.items() if key != "counters"} for event in self.events]
+        threads = {event["tid"] for event in events}
+        names = [{"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid,
+                  "args": {"name": "main" if tid == threading.main_thread().ident else f"thread {tid}"}}
+                 for tid in threads]
+        return {"traceEvents": names + events, "displayTimeUnit": "ms"}
+
+    def export_chrome(self, path):
+        with open(path, "w") as f:
+            json.dump(self.chrome_trace(), f)
+
+    def summary(self):
+        # {name: {"calls", "total_ms", "max_ms", counters...}}, by total time
+        stages = {}
+        with self.lock:
+            events = list(self.events)
+        for event in events:
+            stage = stages.setdefault(event["name"], {"calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+            ms = event["dur"] / 1000
+            stage["calls"] += 1
+            stage["total_ms"] += ms
+            stage["max_ms"] = max(stage["max_ms"], ms)
+            for counter, value in event["counters"].items():
+                stage[counter] = stage.get(counter, 0) + value
+        return dict(sorted(stages.items(), key=lambda item: -item[1]["total_ms"]))
+
+    def summary_table(self):
+        stages = self.summary()
+        width = max([len(name) for name in stages] + [5])
+        lines = [f"{'stage':<{width}} {'calls':>7} {'total ms':>11} {'mean ms':>10} {'max ms':>10}  counters"]
+        for name, stage in stages.items():
+            counters = ", ".join(f"{key}={format_count(value)}" for key, value in stage.items()
+                                 if key not in ("calls", "total_ms", "max_ms"))
+            lines.append(f"{name:<{width}} {stage['calls']:>7} {stage['total_ms']:>11.2f} "
+                         f"{stage['total_ms'] / stage['calls']:>10.2f} {stage['max_ms']:>10.2f}  {counters}")
+        return "\n".join(lines)
+
+    def finish(self):
+        # atexit: write the trace and print the summary once
+        if not self.events or self.path is None:
+            return
+        self.export_chrome(self.path)
+        print(self.summary_table(), file=sys.stderr)
+        print(f"trace: {self.path}", file=sys.stderr)
+
+def format_count(value):
+    if abs(value) < 1000:
+        return f"{value:g}"
+    for unit in ("k", "M", "G", "T"):
+        value /= 1000
+        if abs(value) < 1000 or unit == "T":
+            return f"{value:.1f}{unit}"
+
+def enable_from_env():
+    # main process only: pool workers inherit the environment but must not
+    # overwrite the parent's trace file
+    value = os.environ.get(TRACE_ENV)
+    if multiprocessing.parent_process() is not None:
+        return
+    if value and value.lower() not in ("0", "false", "no"):
+        tracer.enable(DEFAULT_TRACE_PATH if value.lower() in ("1", "true", "yes") else value)
+
+def enable_from_argv(argv=None):
+    # --trace [path] on the command line of an entry point; removes it from argv
+    argv = sys.argv if argv is None else argv
+    if "--trace" not in argv:
+        return
+    i = argv.index("--trace")
+    path = DEFAULT_TRACE_PATH
+    if i + 1 < len(argv) and not argv[i + 1].startswith("-"):
+        path = argv.pop(i + 1)
+    argv.pop(i)
+    tracer.enable(path)
+
+tracer = Tracer()
+enable_from_env()
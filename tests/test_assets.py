@@ -0,0 +1,26 @@
+import os
+import re
+import pytest
+from ui.assets import ASSETS, ASSET_DIR, asset_path, script_tag
+from ui.html_plot import create_chart_page, build_visjs_html
+
+# The GUI must start without network access: every page script is a vendored
+# file under resources/js, and the files are the pinned versions
+
+@pytest.mark.parametrize("name", list(ASSETS))
+def test_vendored_file_matches_pin(name):
+    filename, url = ASSETS[name]
+    version = re.search(r"(\d+\.\d+\.\d+)", filename).group(1)
+    with open(asset_path(name), encoding="utf-8") as f:
+        banner = f.read(1000)
+
+    assert version in url
+    assert re.search(rf"v{re.escape(version)}\b|@version\s+{re.escape(version)}\b", banner)
+    assert os.path.exists(os.path.join(ASSET_DIR, f"LICENSE-{name}.txt"))
+
+def test_pages_load_local_scripts_only():
+    for html in (create_chart_page(), build_visjs_html([(0, 1), (1, 2)])):
+        sources = re.findall(r'<script src="([^"]+)"', html)
+        assert sources
+        assert all(src.startswith("qrc:") or os.path.exists(os.path.join(ASSET_DIR, src)) for src in sources)
+    assert script_tag("plotly") == f'<script src="{ASSETS["plotly"][0]}"></script>'
@@ -0,0 +1,81 @@
+import numpy as np
+import pennylane as qml
+import pytest
+from qaoa.qaoa import build_qnode
+from qaoa.statevector import StatevectorQAOA
+from qaoa.analytic import AnalyticMaxCutP1
+from qaoa.symmetry import StateSymmetry
+from qaoa.reducers import EdgeCorrelatorReducer
+
+# Cross-checks of the numpy engine every sweep, optimizer and plot builds on:
+# against PennyLane's default.qubit, against the closed-form p=1 result, and
+# of the symmetry reduction against the full statevectors
+
+GRAPHS = {
+    "cycle4": [(0, 1), (1, 2), (2, 3), (3, 0)],
+    "house5": [(0, 1), (1, 2), (2, 3), (3, 4), (4, 0), (1, 4)],
+}
+GAMMAS = np.array([0.4, -0.9])
+BETAS = np.array([0.7, 0.25])
+TOL = 1e-10
+
+def num_wires(graph):
+    return max(max(edge) for edge in graph) + 1
+
+@pytest.fixture(params=list(GRAPHS))
+def graph(request):
+    return GRAPHS[request.param]
+
+def test_snapshots_match_pennylane(graph):
+    dev, circuit = build_qnode(graph, num_wires(graph))
+    expected = qml.snapshots(circuit)(GAMMAS, BETAS)
+    snaps = StatevectorQAOA(graph).snapshots(GAMMAS, BETAS)
+
+    assert set(snaps) == set(expected)
+    for i in range(len(expected) - 1):
+        np.testing.assert_allclose(snaps[i], expected[i], rtol=0, atol=TOL)
+    assert snaps["execution_results"] == pytest.approx(float(expected["execution_results"]), abs=TOL)
+
+def test_adjoint_gradient_matches_qml_grad(graph):
+    dev, circuit = build_qnode(graph, num_wires(graph))
+
+    def objective(params):
+        return -0.5 * (len(graph) - circuit(params[0], params[1]))
+
+    params = qml.numpy.array([GAMMAS, BETAS], requires_grad=True)
+    engine = StatevectorQAOA(graph)
+    value, dgammas, dbetas = engine.objective_and_grad(GAMMAS, BETAS)
+
+    assert value == pytest.approx(float(objective(params)), abs=TOL)
+    np.testing.assert_allclose(np.array([dgammas, dbetas]), qml.grad(objective)(params), rtol=0, atol=TOL)
+
+def test_analytic_p1_matches_simulator(graph):
+    analytic = AnalyticMaxCutP1(graph)
+    engine = StatevectorQAOA(graph)
+
+    assert analytic.cross_check(np.linspace(-np.pi, np.pi, 9), np.linspace(-np.pi / 2, np.pi / 2, 7)) < TOL
+    for gamma, beta in ((0.3, 0.2), (-1.1, 0.6)):
+        _, dgammas, dbetas = engine.objective_and_grad([gamma], [beta])
+        dgamma, dbeta = analytic.gradient(gamma, beta)
+        assert dgamma == pytest.approx(dgammas[0], abs=TOL)
+        assert dbeta == pytest.approx(dbetas[0], abs=TOL)
+
+@pytest.mark.parametrize("limit", [256, 2])
+def test_symmetry_reduce_expand_is_lossless(graph, limit):
+    # limit=2 truncates the automorphism list, which must still give exact orbits
+    symmetry = StateSymmetry(graph, num_wires(graph), limit=limit)
+    snaps = StatevectorQAOA(graph).snapshots_batch(np.array([GAMMAS, -GAMMAS]), np.array([BETAS, BETAS / 2]))
+
+    assert len(symmetry) < 2 ** num_wires(graph)
+    np.testing.assert_allclose(symmetry.expand(symmetry.reduce(snaps)), snaps, rtol=0, atol=TOL)
+    reduced = symmetry.reduce(snaps)
+    np.testing.assert_array_equal(symmetry.reduce(symmetry.expand(reduced)), reduced)
+
+def test_edge_correlators_sum_to_expval(graph):
+    engine = StatevectorQAOA(graph)
+    snaps = engine.snapshots(GAMMAS, BETAS)
+    final = snaps[len(snaps) - 2]
+    correlators = EdgeCorrelatorReducer(graph, num_wires(graph)).reduce(final)
+
+    assert correlators.shape == (len(graph),)
+    assert correlators.sum() == pytest.approx(snaps["execution_results"], abs=TOL)
@@ -0,0 +1,18 @@
+import numpy as np
+import pytest
+from qaoa.sweep import sweep_values
+
+CYCLE4 = [(0, 1), (1, 2), (2, 3), (3, 0)]
+
+@pytest.mark.parametrize("workers", [1, 2])
+@pytest.mark.parametrize("symmetry, n_values", [(False, 16), (True, 4)])
+def test_empty_sweep(workers, symmetry, n_values):
+    probs, phases = sweep_values(CYCLE4, 2, [], [], workers=workers, symmetry=symmetry)
+    assert probs.shape == phases.shape == (0, 4, n_values)
+
+def test_sharded_sweep_matches_serial():
+    gammas, betas = [0.1, 0.7, -0.4], [0.3, -0.2, 0.9]
+    serial = sweep_values(CYCLE4, 2, gammas, betas)
+    sharded = sweep_values(CYCLE4, 2, gammas, betas, workers=2)
+    for a, b in zip(serial, sharded):
+        np.testing.assert_array_equal(a, b)
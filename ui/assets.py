@@ -0,0 +1,36 @@
+import os
+import urllib.request
+
+# JS libraries used by the chart / graph pages, vendored under resources/js
+# (licenses next to them) and pinned to exact versions, so the GUI starts
+# without any network access. plotly stays on the 1.58 line the pages were
+# written against (the old plotly-latest URL was frozen at 1.58.5)
+ASSET_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resources", "js")
+
+ASSETS = {
+    "plotly": ("plotly-1.58.4.min.js", "https://cdn.plot.ly/plotly-1.58.4.min.js"),
+    "vis-network": ("vis-network-9.1.2.min.js", "https://unpkg.com/vis-network@9.1.2/standalone/umd/vis-network.min.js")
+}
+
+def asset_path(name):
+    return os.path.join(ASSET_DIR, ASSETS[name][0])
+
+def script_tag(name):
+    # relative to ASSET_DIR: pages must be loaded with ASSET_DIR as base URL
+    filename, _ = ASSETS[name]
+    if not os.path.exists(asset_path(name)):
+        raise FileNotFoundError(f"{filename} is missing from {ASSET_DIR}")
+    return f'<script src="{filename}"></script>'
+
+def vendor_assets(force=False):
+    # maintainers only, when bumping a pin: download the new files into
+    # resources/js on a connected machine and commit them with their licenses
+    os.makedirs(ASSET_DIR, exist_ok=True)
+    for name, (filename, url) in ASSETS.items():
+        path = asset_path(name)
+        if force or not os.path.exists(path):
+            urllib.request.urlretrieve(url, path)
+            print(f"{name}: {url} -> {path}")
+
+if __name__ == "__main__":
+    vendor_assets()
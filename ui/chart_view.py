@@ -0,0 +1,90 @@
+from PyQt5.QtCore import QObject, Qt, pyqtSignal, pyqtSlot
+from PyQt5.QtWebChannel import QWebChannel
+from PyQt5.QtWebEngineWidgets import QWebEngineView
+from PyQt5.QtWidgets import QHBoxLayout, QLabel, QSlider, QVBoxLayout
+from ui.html_plot import create_chart_page
+
+class ChartBridge(QObject):
+    # the page's "bridge" object: Python -> JS through signals, JS -> Python
+    # through ready() once the page has connected
+    data_changed = pyqtSignal(str)
+    run_appended = pyqtSignal(str)
+    layer_changed = pyqtSignal(int)
+
+    def __init__(self):
+        super().__init__()
+        self.loaded = False
+        self.pending = None
+        self.pending_runs = []
+
+    @pyqtSlot()
+    def ready(self):
+        self.loaded = True
+        if self.pending is not None:
+            self.data_changed.emit(self.pending)
+            self.pending = None
+        for payload in self.pending_runs:
+            self.run_appended.emit(payload)
+        self.pending_runs = []
+
+    def send(self, payload):
+        # the latest payload only is kept until the page is ready
+        if self.loaded:
+            self.data_changed.emit(payload)
+        else:
+            self.pending, self.pending_runs = payload, []
+
+    def append(self, payload):
+        # runs appended before the page is ready follow the pending payload
+        if self.loaded:
+            self.run_appended.emit(payload)
+        else:
+            self.pending_runs.append(payload)
+
+
+class ChartView:
+    # one web view, page, slider and label for the whole session; new runs
+    # replace the data inside the page instead of reloading it
+    def __init__(self, title, base_url):
+        self.title = title
+        self.layout = QVBoxLayout()
+
+        self.web_view = QWebEngineView()
+        self.bridge = ChartBridge()
+        self.channel = QWebChannel(self.web_view.page())
+        self.channel.registerObject("bridge", self.bridge)
+        self.web_view.page().setWebChannel(self.channel)
+        self.web_view.setHtml(create_chart_page(), base_url)
+        self.layout.addWidget(self.web_view)
+
+        self.slider = QSlider(Qt.Horizontal)
+        self.slider.setMinimum(0)
+        self.slider.setMaximum(0)
+        self.slider.setEnabled(False)
+        self.label = QLabel(f"{title} Layer 0")
+        row = QHBoxLayout()
+        row.addWidget(self.label)
+        row.addWidget(self.slider)
+        self.layout.addLayout(row)
+        self.slider.valueChanged.connect(self.slider_update)
+
+    def set_data(self, payload, n_snapshots, interactive=True):
+        # payload: ui.html_plot.plot_payload string; the slider is reset to
+        # layer 0 and only enabled for complete (non-preview) data
+        self.slider.blockSignals(True)
+        self.slider.setMaximum(max(0, n_snapshots - 1))
+        self.slider.setValue(0)
+        self.slider.blockSignals(False)
+        self.slider.setEnabled(interactive)
+        self.label.setText(f"{self.title} Layer 0")
+        self.bridge.send(payload)
+
+    def append_run(self, payload):
+        # payload: ui.html_plot.run_payload string, added to the data in the
+        # page (the slider stays as set_data left it)
+        self.bridge.append(payload)
+
+    def slider_update(self, value):
+        # every layer is already in the page: only the index crosses over
+        self.label.setText(f"{self.title} Layer {value}")
+        self.bridge.layer_changed.emit(value)
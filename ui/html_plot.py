@@ -1,10 +1,14 @@
+import base64
 import json
+import numpy as np
+from ui.assets import script_tag
+from qaoa.data_processor import STATE_TICK_LIMIT, bin_states, bin_labels
 
 def create_init_html():
     return f"""
     <html>
     <head>
-        <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
+        {script_tag("plotly")}
     </head>
     <body>
         <div id="plot" style="width:100%;height:100%"></div>
@@ -20,77 +24,177 @@ def create_init_html():
     """
 
 
-def create_plot_html(states, data, params, y_range, num_runs, title):
-    traces_js = ""
-    for (key, y_list) in data.items():
-        for  i, y_vals in enumerate(y_list):
-            x_val = states         
-            y_val = y_vals          
-            param_label = params[i%num_runs]
-            traces_js += f"""
-            {{
-                x: {x_val},
-                y: {y_val},
-                mode: 'lines+markers',
-                name: 'γ,β={param_label}'
-            }},"""
-        break
+# typed arrays travel as base64 of their little-endian bytes inside one JSON
+# payload; decodeArray rebuilds them in the page without any per-value parsing
+DECODE_JS = """
+            function decodeArray(spec) {
+                var bytes = Uint8Array.from(atob(spec.data), c => c.charCodeAt(0));
+                var types = { float32: Float32Array, int32: Int32Array };
+                return new types[spec.dtype](bytes.buffer);
+            }
+"""
 
-    html = f"""
-    <html>
-    <head>
-        <script src="https://cdn.plot.ly/plotly-latest.min.js"></script>
-    </head>
-    <body>
-        <div id="plot" style="width:100%; height:100%;"></div>
 
-        <script>
-            var traces = [{traces_js}];
-
-            var layout = {{
-                title: "{title}",
-                xaxis: {{
-                    title: "State",
-                    type: "category"
-                }},
-                yaxis: {{
-                    title: "Value",
-                    range: [{y_range[0]}, {y_range[1]}]
-                }}
-            }};
+def encode_array(values, dtype="float32"):
+    values = np.ascontiguousarray(values, dtype=np.dtype(dtype).newbyteorder("<"))
+    return {
+        "dtype": dtype,
+        "shape": list(values.shape),
+        "data": base64.b64encode(values.tobytes()).decode("ascii")
+    }
+
+
+def plot_payload(states, data, params, y_range, num_runs, title):
+    # one JSON string for setData: data is a dict of lists or a
+    # (n_layers, n_runs, n_states) array; states are the labels of the plotted
+    # (e.g. top-k) states only, in column order, shared by every trace
+    # past STATE_TICK_LIMIT states the columns are binned (peak per bin, so
+    # narrow spikes stay visible) and the category tick labels are hidden
+    values = np.asarray([data[k] for k in range(len(data))], dtype=np.float32)
+    labels = [str(state) for state in states]
+    binned = len(labels) > STATE_TICK_LIMIT
+    if binned:
+        edges, stats = bin_states(values)
+        values, labels = stats["max"], bin_labels(edges, labels)
+    return json.dumps({
+        "states": labels,
+        "showTicks": not binned,
+        "names": [f"γ,β={params[i % num_runs]}" for i in range(values.shape[1] if values.ndim == 3 else 0)],
+        "title": title,
+        "yRange": [float(y_range[0]), float(y_range[1])],
+        "values": encode_array(values)
+    })
+
+
+def run_payload(values, param, y_range, title):
+    # one JSON string for appendRun: one more run, (n_snapshots, n_states) in
+    # the column order (and binning) of the states already in the page
+    values = np.asarray(values, dtype=np.float32)
+    if values.shape[-1] > STATE_TICK_LIMIT:
+        values = bin_states(values)[1]["max"]
+    return json.dumps({
+        "name": f"γ,β={param}",
+        "title": title,
+        "yRange": [float(y_range[0]), float(y_range[1])],
+        "values": encode_array(values[:, None])
+    })
 
-            Plotly.newPlot("plot", traces, layout);
 
-            // Keep track of visibility for animation
-            var traceVisibility = traces.map(() => true);
+# chart logic shared by the standalone and the persistent page: setData
+# replaces the in-page layer cache, showLayer(k) redraws layer k from it with
+# one Plotly.react (slider moves never carry data), appendRun adds one run to
+# the cache and only its trace to the plot
+CHART_JS = """
+            var states = [], names = [], layers = [], traceVisibility = [];
+            var currentLayer = 0;
+            var layout = {
+                title: "QAOA",
+                xaxis: { title: "State", type: "category" },
+                yaxis: { title: "Value" }
+            };
+
+            function setData(payload) {
+                states = payload.states;
+                if (payload.names.length !== names.length) {
+                    traceVisibility = payload.names.map(() => true);
+                }
+                names = payload.names;
+                // layers[k][i]: y values of run i at layer k, views into one buffer
+                var shape = payload.values.shape;
+                var values = decodeArray(payload.values);
+                layers = [];
+                for (var k = 0; k < shape[0]; k++) {
+                    layers.push([]);
+                    for (var i = 0; i < shape[1]; i++) {
+                        var start = (k * shape[1] + i) * shape[2];
+                        layers[k].push(values.subarray(start, start + shape[2]));
+                    }
+                }
+                layout.title = payload.title;
+                layout.yaxis.range = payload.yRange;
+                layout.xaxis.showticklabels = payload.showTicks !== false;
+                currentLayer = 0;
+                Plotly.react("plot", layerTraces(0), layout);
+            }
+
+            function appendRun(payload) {
+                // shape (n_snapshots, 1, n_states): one view per layer
+                var shape = payload.values.shape;
+                var values = decodeArray(payload.values);
+                for (var k = 0; k < shape[0]; k++) {
+                    if (layers.length <= k) {
+                        layers.push([]);
+                    }
+                    layers[k].push(values.subarray(k * shape[2], (k + 1) * shape[2]));
+                }
+                names.push(payload.name);
+                traceVisibility.push(true);
+                layout.title = payload.title;
+                layout.yaxis.range = payload.yRange;
+                Plotly.addTraces("plot", trace(currentLayer, names.length - 1));
+                Plotly.relayout("plot", { title: payload.title, "yaxis.range": payload.yRange });
+            }
+
+            function trace(k, i) {
+                return {
+                    x: states,
+                    y: layers[k][i],
+                    mode: 'lines+markers',
+                    name: names[i],
+                    visible: traceVisibility[i] ? true : "legendonly"
+                };
+            }
+
+            function layerTraces(k) {
+                if (!layers.length) {
+                    return [];
+                }
+                return layers[k].map((y, i) => trace(k, i));
+            }
+
+            Plotly.newPlot("plot", [], layout);
 
             var plotElement = document.getElementById("plot");
 
-            plotElement.on("plotly_legendclick", function(eventData) {{
+            // Keep track of visibility across layers
+            plotElement.on("plotly_legendclick", function(eventData) {
                 var traceIndex = eventData.curveNumber;
                 traceVisibility[traceIndex] = !traceVisibility[traceIndex];
-            }});
+            });
 
-            plotElement.on("plotly_legenddoubleclick", function(eventData) {{
+            plotElement.on("plotly_legenddoubleclick", function(eventData) {
                 return false;
-            }});
+            });
 
-            // Update Y-values dynamically
-            function updateData(newYs) {{
-                for (var i = 0; i < newYs.length; i++) {{
-                    if (traceVisibility[i]) {{
-                        Plotly.animate("plot", {{
-                            data: [{{ y: newYs[i], visible: true }}],
-                            traces: [i],
-                        }}, {{
-                            transition: {{ duration: 0 }},
-                            frame: {{ duration: 100, redraw: false }}
-                        }});
-                    }} else {{
-                        Plotly.restyle("plot", {{ visible: "legendonly" }}, [i]);
-                    }}
-                }}
-            }}
+            // Slider moves: redraw layer k from the cache, coalesced per frame
+            var pendingLayer = null;
+            function showLayer(k) {
+                var idle = pendingLayer === null;
+                pendingLayer = k;
+                if (idle) {
+                    requestAnimationFrame(function() {
+                        currentLayer = pendingLayer;
+                        Plotly.react("plot", layerTraces(pendingLayer), layout);
+                        pendingLayer = null;
+                    });
+                }
+            }
+"""
+
+
+def create_plot_html(states, data, params, y_range, num_runs, title):
+    # standalone page with every layer embedded once
+    payload = plot_payload(states, data, params, y_range, num_runs, title)
+    html = f"""
+    <html>
+    <head>
+        {script_tag("plotly")}
+    </head>
+    <body>
+        <div id="plot" style="width:100%; height:100%;"></div>
+
+        <script>{DECODE_JS}{CHART_JS}
+            setData({payload});
         </script>
     </body>
     </html>
@@ -98,23 +202,55 @@ def create_plot_html(states, data, params, y_range, num_runs, title):
     return html
 
 
-def build_visjs_html(edges):
-    nodes = sorted(set([n for e in edges for n in e]))
+def create_chart_page():
+    # long-lived page for ChartView: loaded once per view, data arrives through
+    # the QWebChannel "bridge" object as plot_payload strings
+    return f"""
+    <html>
+    <head>
+        {script_tag("plotly")}
+        <script src="qrc:///qtwebchannel/qwebchannel.js"></script>
+    </head>
+    <body>
+        <div id="plot" style="width:100%; height:100%;"></div>
+
+        <script>{DECODE_JS}{CHART_JS}
+            new QWebChannel(qt.webChannelTransport, function(channel) {{
+                var bridge = channel.objects.bridge;
+                bridge.data_changed.connect(payload => setData(JSON.parse(payload)));
+                bridge.run_appended.connect(payload => appendRun(JSON.parse(payload)));
+                bridge.layer_changed.connect(showLayer);
+                bridge.ready();
+            }});
+        </script>
+    </body>
+    </html>
+    """
+
 
-    js_nodes = json.dumps([{"id": n, "label": str(n)} for n in nodes])
-    js_edges = json.dumps([{"from": u, "to": v} for u, v in edges])
+def build_visjs_html(edges):
+    # edges as one int32 (n_edges, 2) typed array, same encoding as the plots
+    payload = json.dumps({"edges": encode_array(np.asarray(edges).reshape(-1, 2), "int32")})
 
     return f"""
     <html>
     <head>
-        <script src="https://unpkg.com/vis-network/standalone/umd/vis-network.min.js"></script>
+        {script_tag("vis-network")}
         <style>#graph {{ width:100%; height:100vh; }}</style>
     </head>
     <body>
         <div id="graph"></div>
-        <script>
-            var nodes = new vis.DataSet({js_nodes});
-            var edges = new vis.DataSet({js_edges});
+        <script>{DECODE_JS}
+            var pairs = decodeArray({payload}.edges);
+            var edgeList = [], seen = new Set();
+            for (var e = 0; e < pairs.length; e += 2) {{
+                edgeList.push({{from: pairs[e], to: pairs[e + 1]}});
+                seen.add(pairs[e]);
+                seen.add(pairs[e + 1]);
+            }}
+            var nodeIds = Array.from(seen).sort((a, b) => a - b);
+            var nodes = new vis.DataSet(nodeIds.map(n => ({{id: n, label: String(n)}})));
+            var edges = new vis.DataSet(edgeList);
 
             var network = new vis.Network(
                 document.getElementById('graph'),
@@ -1,39 +1,34 @@
-from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QSlider, QLabel, QGraphicsView, QGraphicsScene, QPushButton, QDialog
-from PyQt5.QtWebEngineWidgets import QWebEngineView
-from ui.html_plot import build_visjs_html, create_plot_html, create_init_html
-from data.loader import load_json, load_edges, write_values
+from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGraphicsView, QGraphicsScene, QPushButton, QDialog, QProgressBar
+from ui.html_plot import build_visjs_html, plot_payload, run_payload
+from ui.chart_view import ChartView
+from data.loader import load_edges, write_values
 from ui.edit_widow import LayerEditDialog
 from ui.init_window import LayerInitDialog
 from ui.graph_canvas import QAOALayerCanvas
 from functools import partial
-from qaoa.qaoa import QAOAMaxCut
-from PyQt5.QtCore import Qt
+import numpy as np
+from ui.worker import QAOAWorker, start_worker
+from qaoa.trace import tracer
+from ui.assets import ASSET_DIR
+import os
+from qaoa.statevector import repeat_layers
+from PyQt5.QtCore import QUrl
 from qaoa.data_processor import DataProcessor
+from qaoa.symmetry import StateSymmetry
 
-states = [
-            "0000",
-            "0001",
-            "0010",
-            "0011",
-            "0100",
-            "0101",
-            "0110",
-            "0111",
-            "1000",
-            "1001",
-            "1010",
-            "1011",
-            "1100",
-            "1101",
-            "1110",
-            "1111"
-        ]
+# most probable states shown on the x axis; only their labels are ever built
+TOP_K = 16
+
+def base_url():
+    # pages are loaded relative to the vendored JS (see ui/assets.py)
+    return QUrl.fromLocalFile(ASSET_DIR + os.sep)
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Interactive QAOA")
         self.params_prob, self.data_prob = None, None
+        self.worker, self.run_thread = None, None
         with open("resources/styles.qss", "r") as f:
             self.setStyleSheet(f.read())
         self.setup_ui()
@@ -46,11 +41,23 @@ class MainWindow(QMainWindow):
         init_button.clicked.connect(self.open_init_dialog)
         main_layout.addWidget(init_button)
 
-        self.prob_layout, self.prob_view = self.setup_linecharts()
-        self.phase_layout, self.phase_view = self.setup_linecharts()
+        # progress of the background runs; Cancel stops after the current run
+        progress_row = QHBoxLayout()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFormat("Idle")
+        self.cancel_button = QPushButton("Cancel")
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.clicked.connect(self.cancel_runs)
+        progress_row.addWidget(self.progress_bar)
+        progress_row.addWidget(self.cancel_button)
+        main_layout.addLayout(progress_row)
+
+        # one persistent page + slider per chart; runs only push new data
+        self.prob_chart = self.setup_linecharts("Probability")
+        self.phase_chart = self.setup_linecharts("Phase")
 
-        main_layout.addLayout(self.prob_layout)
-        main_layout.addLayout(self.phase_layout)
+        main_layout.addLayout(self.prob_chart.layout)
+        main_layout.addLayout(self.phase_chart.layout)
 
         self.setCentralWidget(main)
 
@@ -59,19 +66,12 @@ class MainWindow(QMainWindow):
         for child in children_layout:
             parent_layout.addLayout(child)
         
-    def setup_linecharts(self):
-        layout = QVBoxLayout()
-        web_view = QWebEngineView()
-        web_view.setHtml(create_init_html())   
-        layout.addWidget(web_view)
-        return layout, web_view
+    def setup_linecharts(self, title):
+        return ChartView(title, base_url())
 
     
-    # write_values(path="resources/prova.json", n_snapshots=2, y_range=y_range, fixed_params=params, states=states, metric_dict=all_probs)
+    # write_values(path="resources/prova.qres", n_snapshots=2, y_range=y_range, fixed_params=params, states=states, metric_dict=all_probs)
     def open_init_dialog(self):
-        key_offset = 0
-        all_probs, all_phases = {}, {}
-
         dialog = LayerInitDialog()
         dialog.add_layer_init_row()
         dialog.add_layer_row()
@@ -79,97 +79,170 @@ class MainWindow(QMainWindow):
         if dialog.exec_() != QDialog.Accepted:
             return
 
-        params = dialog.get_values()
-        num_layers = dialog.get_number_of_layers()
-        num_runs = len(params)
+        # traced from the accepted dialog on: time spent typing is not a stage;
+        # the sweep itself is traced by QAOAWorker.run on the worker thread
+        with tracer.span("open_init_dialog") as span:
+            params = dialog.get_values()
+            num_layers = dialog.get_number_of_layers()
 
-        for (gamma, beta) in params:
-            same_param_for_each_layer = [[gamma] * num_layers, [beta] * num_layers]
+            gammas = repeat_layers([gamma for gamma, _ in params], num_layers)
+            betas = repeat_layers([beta for _, beta in params], num_layers)
 
-            qaoa = QAOAMaxCut(
-                graph=[(0,1),(1,2),(2,3),(3,0)],
-                num_layers=num_layers,
-                params=same_param_for_each_layer
-            )
-            snaps = qaoa.run()
-            dp = DataProcessor(snaps)
+            graph = [(0,1),(1,2),(2,3),(3,0)]
+            self.start_runs(graph, num_layers, gammas, betas, params)
+            span.add("runs", len(params))
 
-            probs, phases = dp.get_values_from_snaps()
-            n_snapshots = len(probs)
+    def start_runs(self, graph, num_layers, gammas, betas, params):
+        # runs execute on a worker thread; each finished run is previewed as
+        # it arrives and the full plots (with sliders) are built at the end
+        self.cancel_runs()
+        if self.run_thread is not None:
+            self.run_thread.wait()
+        # states with equal amplitudes by symmetry are computed and sent once,
+        # and expanded back to every state on this side for plotting
+        self.symmetry = StateSymmetry.for_graph(graph)
+        self.run_params, self.num_layers = params, num_layers
+        self.run_probs, self.run_phases, self.preview_idx = [], [], None
 
-            for k, v in probs.items():
-                all_probs[key_offset + k] = v
-            for k, v in phases.items():
-                all_phases[key_offset + k] = v
+        # slots get the worker so late signals of a replaced one are ignored
+        worker = QAOAWorker(graph, num_layers, gammas, betas, self.symmetry)
+        worker.run_finished.connect(partial(self.on_run_finished, worker))
+        worker.progress.connect(partial(self.on_progress, worker))
+        worker.failed.connect(partial(self.on_run_failed, worker))
+        worker.finished.connect(partial(self.on_runs_finished, worker))
+        self.worker = worker
+        self.progress_bar.setRange(0, len(params))
+        self.progress_bar.setValue(0)
+        self.cancel_button.setEnabled(True)
+        self.run_thread = start_worker(self.worker)
 
-            key_offset += n_snapshots
+    def cancel_runs(self):
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def on_progress(self, worker, done, total):
+        if worker is not self.worker:
+            return
+        self.progress_bar.setValue(done)
+        self.progress_bar.setFormat(f"Run {done}/{total}")
+
+    def on_run_failed(self, worker, message):
+        if worker is not self.worker:
+            return
+        self.progress_bar.setFormat(f"Failed: {message}")
+
+    def on_run_finished(self, worker, index, probs, phases):
+        if worker is not self.worker:
+            return
+        # (n_snapshots, n_orbits) arrays of one run
+        self.run_probs.append(probs)
+        self.run_phases.append(phases)
+        n_snapshots = 2 * self.num_layers
+        dp = DataProcessor({}, symmetry=self.symmetry)
+        probs, phases = dp.expand(probs), dp.expand(phases)
+        if self.preview_idx is None:
+            # x axis of the preview: top-k states of the first run; the top-k
+            # columns of every run go into one preallocated buffer per chart
+            self.preview_idx, self.preview_states = DataProcessor({}).get_top_k_states(probs, TOP_K)
+            shape = (len(self.run_params) * n_snapshots, len(self.preview_idx))
+            self.preview = {"Probability": np.empty(shape), "Phase": np.empty(shape)}
+            self.preview_bounds = {}
+        # only the new run is expanded, stored and sent to the page
+        done = index + 1
+        rows = slice(index * n_snapshots, done * n_snapshots)
+        for values, title, chart in (
+            (probs, "Probability", self.prob_chart),
+            (phases, "Phase", self.phase_chart)
+        ):
+            buffer = self.preview[title]
+            buffer[rows] = values[:, self.preview_idx]
+            lo, hi = self.preview_bounds.get(title, (np.inf, -np.inf))
+            self.preview_bounds[title] = bounds = (min(lo, buffer[rows].min()), max(hi, buffer[rows].max()))
+            label = f"{title} ({done}/{len(self.run_params)})"
+            if index == 0:
+                self.update_plot(
+                    metric_dict=buffer[rows],
+                    title=label,
+                    states=self.preview_states,
+                    chart=chart,
+                    params=self.run_params[:1],
+                    num_layers=self.num_layers,
+                    interactive=False
+                )
+            else:
+                self.append_plot(buffer[rows], label, chart, self.run_params[index], np.array(bounds))
+
+    def on_runs_finished(self, worker):
+        if worker is not self.worker:
+            return
+        self.worker, self.run_thread = None, None
+        self.cancel_button.setEnabled(False)
+        if not self.run_probs:
+            return
+        # (num_runs * n_snapshots, 2^num_wires) arrays, rows in the same run-major
+        # order the key_offset dicts used; a cancelled sweep keeps its finished runs
+        dp = DataProcessor({}, symmetry=self.symmetry)
+        all_probs = dp.expand(np.concatenate(self.run_probs))
+        all_phases = dp.expand(np.concatenate(self.run_phases))
+        idx, states = DataProcessor({}).get_top_k_states(all_probs, TOP_K)
+        all_probs, all_phases = all_probs[:, idx], all_phases[:, idx]
+        params = self.run_params[:len(self.run_probs)]
 
         self.update_plot(
             metric_dict=all_probs,
             title="Probability",
-            web_view=self.prob_view,
-            layout=self.prob_layout,
+            states=states,
+            chart=self.prob_chart,
             params=params,
-            num_layers=num_layers
+            num_layers=self.num_layers
         )
 
         self.update_plot(
             metric_dict=all_phases,
             title="Phase",
-            web_view=self.phase_view,
-            layout=self.phase_layout,
-            params=params,
-            num_layers=num_layers
-        )
-        
-        
-    def update_plot(self, metric_dict, title, web_view, layout, params, num_layers):
-        dp = DataProcessor({})  
-
-        y_range = dp.get_y_range(metric_dict)
-        data_per_layer = dp.get_data_per_layer(
-            states=states,
-            metric_dict=metric_dict,
-            n_snapshots=num_layers * 2
-        )
-
-        html_content = create_plot_html(
             states=states,
-            data=data_per_layer,
+            chart=self.phase_chart,
             params=params,
-            y_range=y_range,
-            num_runs=len(params),
-            title=title
+            num_layers=self.num_layers
         )
-        web_view.setHtml(html_content)
 
-        slider = QSlider(Qt.Horizontal)
-        slider.setMinimum(0)
-        slider.setMaximum(num_layers * 2 - 1)
-
-        label = QLabel(f"{title} Layer 0")
+    def closeEvent(self, event):
+        self.cancel_runs()
+        if self.run_thread is not None:
+            self.run_thread.wait()
+        super().closeEvent(event)
+        
+    def update_plot(self, metric_dict, title, states, chart, params, num_layers, interactive=True):
+        with tracer.span("update_plot", args={"title": title, "preview": not interactive}) as span:
+            dp = DataProcessor({})  
 
-        h = QHBoxLayout()
-        h.addWidget(label)
-        h.addWidget(slider)
-        layout.addLayout(h)
+            y_range = dp.get_y_range(metric_dict)
+            data_per_layer = dp.get_data_per_layer(
+                states=states,
+                metric_dict=metric_dict,
+                n_snapshots=num_layers * 2
+            )
 
-        slider.valueChanged.connect(
-            partial(
-                self.slider_update,
+            payload = plot_payload(
+                states=states,
                 data=data_per_layer,
-                slider_label=label,
-                web_view=web_view
+                params=params,
+                y_range=y_range,
+                num_runs=len(params),
+                title=title
             )
-        )
-
-
-    def slider_update(self, value, data, slider_label, web_view) -> None:
-        slider_label.setText(f"Layer: {value}")
-        new_y_values = data[value]
-        js_array = "[" + ",".join(str(y) for y in new_y_values) + "]"
-        web_view.page().runJavaScript(f"updateData({js_array});")
+            chart.set_data(payload, num_layers * 2, interactive)
+            span.add("states", len(states))
+            span.add("bytes", len(payload))
         
+    def append_plot(self, values, title, chart, param, bounds):
+        # one more run on the preview: (n_snapshots, k) values, y range from
+        # the running min / max of every run so far
+        with tracer.span("append_plot", args={"title": title}) as span:
+            payload = run_payload(values, param, DataProcessor({}).get_y_range(bounds), title)
+            chart.append_run(payload)
+            span.add("bytes", len(payload))
+
     # def open_edit_dialog(self, params, web_view, data):
     #     pass
     #     dialog = LayerEditDialog(params)
@@ -0,0 +1,78 @@
+from PyQt5.QtCore import QObject, QThread, Qt, pyqtSignal, pyqtSlot
+import numpy as np
+from qaoa.qaoa import QAOAMaxCut
+from qaoa.data_processor import DataProcessor
+from qaoa.statevector import BATCH_AMPLITUDES
+from qaoa.trace import tracer
+
+class QAOAWorker(QObject):
+    # evolves the (gamma, beta) runs off the GUI thread, in batched stacks of
+    # at most BATCH_AMPLITUDES amplitudes (one run at a time past 16 qubits),
+    # and hands each finished run to the window as soon as its stack is done
+    run_finished = pyqtSignal(int, object, object)  # run index, probs, phases
+    progress = pyqtSignal(int, int)                 # runs done, total runs
+    failed = pyqtSignal(str)
+    finished = pyqtSignal()
+
+    def __init__(self, graph, num_layers, gammas, betas, symmetry=None):
+        super().__init__()
+        self.graph = graph
+        self.num_layers = num_layers
+        self.gammas = np.asarray(gammas, dtype=float)
+        self.betas = np.asarray(betas, dtype=float)
+        self.symmetry = symmetry
+        self.cancelled = False
+
+    def cancel(self):
+        # checked between stacks; the stack in progress is completed first
+        self.cancelled = True
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            # the sweep runs here, off the GUI thread: one span for the whole
+            # worker (its own thread row in the trace), one per stack
+            with tracer.span("QAOAWorker.run", args={"layers": self.num_layers}, runs=0) as span:
+                # no prefix cache: the dialog repeats one (gamma, beta) on every
+                # layer, so distinct runs never share a layer-1 prefix
+                qaoa = QAOAMaxCut(
+                    graph=self.graph,
+                    num_layers=self.num_layers,
+                    backend="numpy"
+                )
+                total = len(self.gammas)
+                chunk = max(1, BATCH_AMPLITUDES // 2 ** qaoa.num_wires)
+                for start in range(0, total, chunk):
+                    if self.cancelled:
+                        break
+                    # (n_runs, n_snapshots, 2**n) -> (n_runs * n_snapshots, n_values)
+                    # arrays, emitted as one (n_snapshots, n_values) block per run
+                    rows = slice(start, start + chunk)
+                    with tracer.span("QAOAWorker.stack", runs=len(self.gammas[rows])):
+                        batch = qaoa.run_batch(self.gammas[rows], self.betas[rows])
+                        dp = DataProcessor(batch, as_arrays=True, symmetry=self.symmetry)
+                        probs, phases = dp.get_values_from_snaps()
+                    n_snapshots = batch.shape[1]
+                    for run in range(len(batch)):
+                        block = slice(run * n_snapshots, (run + 1) * n_snapshots)
+                        self.run_finished.emit(start + run, probs[block], phases[block])
+                        self.progress.emit(start + run + 1, total)
+                    span.add("runs", len(batch))
+        except Exception as e:
+            self.failed.emit(str(e))
+        finally:
+            self.finished.emit()
+
+def start_worker(worker):
+    # moves the worker to a new QThread, starts it and tears both down when
+    # the worker is done; returns the thread
+    thread = QThread()
+    worker.moveToThread(thread)
+    thread.started.connect(worker.run)
+    # direct: quit must not wait for the GUI event loop, which may be
+    # blocked in thread.wait()
+    worker.finished.connect(thread.quit, Qt.DirectConnection)
+    worker.finished.connect(worker.deleteLater)
+    thread.finished.connect(thread.deleteLater)
+    thread.start()
+    return thread